@@ -0,0 +1,197 @@
+import argparse
+import errno
+import hashlib
+import itertools
+import os
+import secrets
+import tempfile
+import time
+from pathlib import Path
+
+BLOBS_DIRNAME = ".blobs"
+DEFAULT_OUTPUTS_DIR = Path(__file__).resolve().parent / "outputs"
+# Blobs touched more recently than this are never collected, so a blob that
+# was just stored but not linked yet survives a concurrent ``gc``.
+GC_GRACE_SECONDS = 3600
+# Errors from os.link that mean "hardlinks are not possible here"; anything
+# else (missing blob, full disk, ...) is a real failure.
+_NO_HARDLINK_ERRNOS = {
+    errno.EXDEV,
+    errno.EPERM,
+    errno.ENOTSUP,
+    errno.EOPNOTSUPP,
+    errno.EMLINK,
+}
+
+
+class BlobStore:
+    """Content-addressed storage for generated text and audio.
+
+    Blobs live in ``<outputs>/.blobs/<aa>/<sha256>`` and are made read-only.
+    Story directories reference them through hardlinks, or relative symlinks
+    when the filesystem does not support hardlinks, so identical outputs take
+    disk and page cache space only once. A blob's reference count is the number
+    of files under ``<outputs>`` and ``reference_dirs`` (e.g. checkpoints kept
+    outside the public outputs) that point at it.
+    """
+
+    def __init__(
+        self, outputs_dir: Path | str, reference_dirs: list[Path | str] = ()
+    ) -> None:
+        self.outputs_dir = Path(outputs_dir)
+        self.root = self.outputs_dir / BLOBS_DIRNAME
+        self.reference_dirs = [Path(d) for d in reference_dirs]
+
+    def blob_path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest
+
+    def put(self, data: bytes) -> Path:
+        """Store ``data`` if it is not stored yet and return its blob path."""
+        path = self.blob_path(hashlib.sha256(data).hexdigest())
+        if path.exists():
+            os.utime(path)
+            return path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(
+            prefix=f"{path.name}.", suffix=".tmp", dir=path.parent
+        )
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.chmod(tmp_name, 0o444)
+            # Publish with link() rather than replace() so a concurrent writer
+            # of the same content never swaps the inode that earlier callers
+            # already hardlinked into their outputs.
+            try:
+                os.link(tmp_name, path)
+            except FileExistsError:
+                pass
+            except OSError as exc:
+                if exc.errno not in _NO_HARDLINK_ERRNOS:
+                    raise
+                os.replace(tmp_name, path)
+        finally:
+            Path(tmp_name).unlink(missing_ok=True)
+        return path
+
+    def link(self, blob: Path, dest: Path) -> None:
+        """Atomically point ``dest`` at ``blob``, replacing any existing file."""
+        tmp_path = dest.with_name(f"{dest.name}.{secrets.token_hex(8)}.tmp")
+        try:
+            try:
+                os.link(blob, tmp_path)
+            except OSError as exc:
+                if exc.errno not in _NO_HARDLINK_ERRNOS:
+                    raise
+                os.symlink(os.path.relpath(blob, dest.parent), tmp_path)
+            os.replace(tmp_path, dest)
+        finally:
+            # rename() is a no-op when dest is already a hardlink to the blob,
+            # leaving tmp_path behind.
+            tmp_path.unlink(missing_ok=True)
+
+    def _blobs(self) -> dict[tuple[int, int], Path]:
+        blobs = {}
+        if self.root.exists():
+            for path in self.root.glob("*/*"):
+                if path.suffix == ".tmp":
+                    continue
+                st = path.stat()
+                blobs[(st.st_dev, st.st_ino)] = path
+        return blobs
+
+    def refcounts(self) -> dict[Path, int]:
+        """Return the number of output files referencing each blob."""
+        blobs = self._blobs()
+        counts = {path: 0 for path in blobs.values()}
+        root = self.root.resolve()
+        walks = [os.walk(d) for d in (self.outputs_dir, *self.reference_dirs)]
+        for dirpath, dirnames, filenames in itertools.chain(*walks):
+            if Path(dirpath) == self.outputs_dir and BLOBS_DIRNAME in dirnames:
+                dirnames.remove(BLOBS_DIRNAME)
+            for name in filenames:
+                path = Path(dirpath) / name
+                if path.is_symlink():
+                    target = path.resolve()
+                    if target.parent.parent == root:
+                        blob = self.blob_path(target.name)
+                        if blob in counts:
+                            counts[blob] += 1
+                    continue
+                st = path.stat()
+                blob = blobs.get((st.st_dev, st.st_ino))
+                if blob is not None:
+                    counts[blob] += 1
+        return counts
+
+    def gc(self, grace_seconds: float = GC_GRACE_SECONDS) -> list[Path]:
+        """Delete blobs that no output references and return their paths."""
+        removed = []
+        cutoff = time.time() - grace_seconds
+        for blob, count in self.refcounts().items():
+            if count == 0 and blob.stat().st_mtime <= cutoff:
+                blob.unlink()
+                removed.append(blob)
+        return removed
+
+    def usage(self) -> dict[str, int]:
+        """Report blob counts and logical vs. physical disk usage in bytes."""
+        counts = self.refcounts()
+        sizes = {blob: blob.stat().st_size for blob in counts}
+        return {
+            "blobs": len(counts),
+            "unreferenced_blobs": sum(1 for c in counts.values() if c == 0),
+            "references": sum(counts.values()),
+            "stored_bytes": sum(sizes.values()),
+            "logical_bytes": sum(sizes[b] * c for b, c in counts.items()),
+            "reclaimable_bytes": sum(
+                sizes[b] for b, c in counts.items() if c == 0
+            ),
+        }
+
+
+def main():
+    # Imported here because checkpoints builds on this module.
+    from .checkpoints import (
+        CHECKPOINT_TTL_SECONDS,
+        checkpoints_root,
+        expire_checkpoints,
+    )
+
+    parser = argparse.ArgumentParser(description="Manage stored story artifacts")
+    parser.add_argument(
+        "command",
+        choices=["du", "gc"],
+        help="du: report disk usage, gc: delete unreferenced blobs",
+    )
+    parser.add_argument(
+        "--outputs-dir",
+        default=str(DEFAULT_OUTPUTS_DIR),
+        help="Outputs directory containing the blob store",
+    )
+    parser.add_argument(
+        "--grace",
+        type=float,
+        default=GC_GRACE_SECONDS,
+        help="Keep unreferenced blobs younger than this many seconds",
+    )
+    parser.add_argument(
+        "--checkpoint-ttl",
+        type=float,
+        default=CHECKPOINT_TTL_SECONDS,
+        help="gc: delete unfinished-run checkpoints older than this many seconds",
+    )
+    args = parser.parse_args()
+
+    store = BlobStore(args.outputs_dir, [checkpoints_root(args.outputs_dir)])
+    if args.command == "gc":
+        expired = expire_checkpoints(args.outputs_dir, args.checkpoint_ttl)
+        print(f"Removed {len(expired)} expired checkpoints")
+        removed = store.gc(args.grace)
+        print(f"Removed {len(removed)} unreferenced blobs")
+    for key, value in store.usage().items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
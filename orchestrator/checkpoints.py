@@ -0,0 +1,251 @@
+import hashlib
+import json
+import os
+import re
+import secrets
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from .blobstore import BlobStore
+
+CHECKPOINTS_DIRNAME = "checkpoints"
+STAGES = ("context", "prompt", "story", "audio")
+# Unfinished runs nobody retried within this many seconds are deleted by
+# ``expire_checkpoints`` so their stage files stop pinning blobs.
+CHECKPOINT_TTL_SECONDS = 7 * 24 * 3600
+# Claims on interrupted runs older than this belong to a dead instance. It must
+# be longer than any run's deadline (STORY_TIMEOUT).
+CLAIM_TTL_SECONDS = 3600
+_FINGERPRINT_RE = re.compile(r"[0-9a-f]{64}")
+
+
+def is_fingerprint(value: str) -> bool:
+    """Return whether ``value`` looks like a :func:`request_fingerprint`."""
+    return _FINGERPRINT_RE.fullmatch(value) is not None
+
+
+def checkpoints_root(outputs_dir: Path | str) -> Path:
+    """Return the checkpoint directory for ``outputs_dir``.
+
+    It sits next to the outputs, not inside them, because the outputs are
+    served publicly and checkpoints hold request parameters, backend errors
+    and partial results.
+    """
+    return Path(outputs_dir).parent / CHECKPOINTS_DIRNAME
+
+
+def request_fingerprint(**params: object) -> str:
+    """Return a stable hash identifying a pipeline request."""
+    encoded = json.dumps(params, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class Checkpoint:
+    """Completed stage results of one pipeline run, keyed by its fingerprint.
+
+    Stage data is stored in the blob store and linked into
+    ``<outputs>/../checkpoints/<fingerprint>/<stage>``; ``state.json`` records
+    the request parameters and the stage that failed, if any. Once the run
+    finishes the checkpoint is removed, so only interrupted or failed runs are
+    resumed.
+    """
+
+    def __init__(self, outputs_dir: Path | str, fingerprint: str) -> None:
+        if not is_fingerprint(fingerprint):
+            raise ValueError(f"Invalid fingerprint {fingerprint!r}")
+        self.fingerprint = fingerprint
+        self.store = BlobStore(outputs_dir)
+        self.directory = checkpoints_root(outputs_dir) / fingerprint
+        self.state_path = self.directory / "state.json"
+        self._claim_token: str | None = None
+
+    def state(self) -> dict | None:
+        """Return the run state, or None if there is no resumable run."""
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return None
+        # Without the request parameters the run cannot be resumed.
+        return state if "params" in state else None
+
+    def _write_state(self, state: dict) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(
+            prefix="state.json.", suffix=".tmp", dir=self.directory
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(state, f, indent=2)
+            os.replace(tmp_name, self.state_path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+    def start(self, params: dict) -> None:
+        state = self.state() or {"params": params}
+        state.update(status="running", failed_stage=None, error=None)
+        self._write_state(state)
+
+    def completed_stages(self) -> list[str]:
+        return [stage for stage in STAGES if (self.directory / stage).exists()]
+
+    def get(self, stage: str) -> bytes | None:
+        try:
+            return (self.directory / stage).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def put(self, stage: str, data: bytes) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.store.link(self.store.put(data), self.directory / stage)
+
+    def fail(self, stage: str, exc: BaseException) -> None:
+        state = self.state()
+        if state is None:
+            # The run finished concurrently; nothing is left to retry.
+            return
+        # A run cancelled by a draining server stays resumable by other instances.
+        if state.get("status") != "interrupted":
+            state["status"] = "failed"
+        state.update(failed_stage=stage, error=str(exc))
+        self._write_state(state)
+
+    def interrupt(self) -> None:
+        """Mark an unfinished run for another instance to resume."""
+        state = self.state()
+        if state is not None:
+            state["status"] = "interrupted"
+            self._write_state(state)
+
+    def claim(self, ttl_seconds: float = CLAIM_TTL_SECONDS) -> bool:
+        """Atomically claim an interrupted run; return False if already taken.
+
+        A claim older than ``ttl_seconds`` was left by an instance that died
+        while resuming the run, and is taken over.
+        """
+        claim_path = self.directory / "claim"
+        token = secrets.token_hex(8)
+        for _ in range(2):
+            try:
+                fd = os.open(claim_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileNotFoundError:
+                return False
+            except FileExistsError:
+                if not _break_stale_claim(claim_path, ttl_seconds):
+                    return False
+                continue
+            with os.fdopen(fd, "w") as f:
+                f.write(token)
+            self._claim_token = token
+            return True
+        return False
+
+    def release(self) -> None:
+        """Drop this instance's claim, leaving claims made elsewhere alone."""
+        claim_path = self.directory / "claim"
+        try:
+            if claim_path.read_text() == self._claim_token:
+                claim_path.unlink()
+        except FileNotFoundError:
+            pass
+        self._claim_token = None
+
+    def finish(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def _break_stale_claim(claim_path: Path, ttl_seconds: float) -> bool:
+    """Remove ``claim_path`` if it is older than ``ttl_seconds``.
+
+    The claim is renamed away first so that only one instance can break it.
+    Returns True if the caller may try to claim again.
+    """
+    cutoff = time.time() - ttl_seconds
+    stale = claim_path.with_name(f"claim.{secrets.token_hex(8)}.stale")
+    try:
+        if claim_path.stat().st_mtime > cutoff:
+            return False
+        os.rename(claim_path, stale)
+    except FileNotFoundError:
+        return True
+    try:
+        if stale.stat().st_mtime > cutoff:
+            # Another instance broke the stale claim and claimed the run
+            # between our stat() and rename(); give its claim back.
+            try:
+                os.link(stale, claim_path)
+            except FileExistsError:
+                pass
+            return False
+        return True
+    finally:
+        stale.unlink()
+
+
+def _checkpoints(outputs_dir: Path | str) -> list[Checkpoint]:
+    root = checkpoints_root(outputs_dir)
+    if not root.exists():
+        return []
+    return [
+        Checkpoint(outputs_dir, path.name)
+        for path in root.iterdir()
+        if is_fingerprint(path.name)
+    ]
+
+
+def _resumable(checkpoint: Checkpoint) -> bool:
+    status = (checkpoint.state() or {}).get("status")
+    if status == "interrupted":
+        return True
+    # Resuming marks the run "running" again; while it stays claimed it is
+    # listed too, so the claim can be taken over if the resumer died.
+    return status == "running" and (checkpoint.directory / "claim").exists()
+
+
+def interrupted_runs(outputs_dir: Path | str) -> list[Checkpoint]:
+    """Return checkpoints of runs handed off by a shutting-down instance.
+
+    Claimed runs that are still running are included; :meth:`Checkpoint.claim`
+    only succeeds for them once the claim has expired.
+    """
+    return [c for c in _checkpoints(outputs_dir) if _resumable(c)]
+
+
+def expire_checkpoints(
+    outputs_dir: Path | str, ttl_seconds: float = CHECKPOINT_TTL_SECONDS
+) -> list[Path]:
+    """Delete checkpoints untouched for ``ttl_seconds`` and return their paths.
+
+    Age is taken from ``state.json``, which is rewritten whenever a run
+    starts, fails or is handed off, or from the directory if it has none.
+    """
+    removed = []
+    cutoff = time.time() - ttl_seconds
+    for checkpoint in _checkpoints(outputs_dir):
+        path = checkpoint.state_path
+        if not path.exists():
+            path = checkpoint.directory
+        try:
+            expired = path.stat().st_mtime <= cutoff
+        except FileNotFoundError:
+            continue
+        if expired:
+            checkpoint.finish()
+            removed.append(checkpoint.directory)
+    return removed
+
+
+def resume_stage(checkpoint: Checkpoint, stage: str, produce) -> bytes:
+    """Return the checkpointed result of ``stage``, running ``produce`` if missing."""
+    data = checkpoint.get(stage)
+    if data is None:
+        try:
+            data = produce()
+        except BaseException as exc:
+            checkpoint.fail(stage, exc)
+            raise
+        checkpoint.put(stage, data)
+    return data
@@ -0,0 +1,125 @@
+import os
+import threading
+import time
+
+STAGES = ("sources", "llm", "tts", "write")
+
+DEFAULT_TIMEOUT = 300.0
+DEFAULT_STAGE_TIMEOUTS = {
+    "sources": 10.0,
+    "llm": 180.0,
+    "tts": 120.0,
+    "write": 10.0,
+}
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a pipeline stage cannot start or finish before the deadline."""
+
+
+class PipelineCancelled(Exception):
+    """Raised when a pipeline is cancelled, e.g. because the client went away."""
+
+
+class Deadline:
+    """Overall request deadline with per-stage timeout budgets.
+
+    Each stage gets ``min(stage budget, time remaining)`` as its timeout so a
+    hung backend can never hold a worker longer than the request allows.
+    """
+
+    def __init__(
+        self,
+        timeout: float | None = DEFAULT_TIMEOUT,
+        stage_timeouts: dict[str, float] | None = None,
+    ) -> None:
+        if timeout is not None and timeout <= 0:
+            raise ValueError("timeout must be positive")
+        self.expires_at = time.monotonic() + timeout if timeout is not None else None
+        self.stage_timeouts = {**DEFAULT_STAGE_TIMEOUTS, **(stage_timeouts or {})}
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: list = []
+
+    @classmethod
+    def from_env(cls, timeout: float | None = None) -> "Deadline":
+        """Build a deadline from ``STORY_TIMEOUT`` and ``STAGE_TIMEOUT_<STAGE>``."""
+        limit = float(os.environ.get("STORY_TIMEOUT", DEFAULT_TIMEOUT))
+        if timeout is not None:
+            if timeout <= 0:
+                raise ValueError("timeout must be positive")
+            limit = min(limit, timeout)
+        stage_timeouts = {}
+        for stage in STAGES:
+            value = os.environ.get(f"STAGE_TIMEOUT_{stage.upper()}")
+            if value:
+                stage_timeouts[stage] = float(value)
+        return cls(limit, stage_timeouts)
+
+    def remaining(self) -> float | None:
+        if self.expires_at is None:
+            return None
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self._cancelled.is_set():
+                return
+            self._cancelled.set()
+            callbacks = list(self._callbacks)
+            self._callbacks.clear()
+        for callback in callbacks:
+            callback()
+
+    def on_cancel(self, callback) -> None:
+        """Call ``callback`` on cancellation, immediately if already cancelled."""
+        with self._lock:
+            if not self._cancelled.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def check(self, stage: str) -> None:
+        if self.cancelled:
+            raise PipelineCancelled(f"Pipeline cancelled before {stage} stage")
+        if self.remaining() == 0.0:
+            raise DeadlineExceeded(f"Deadline exceeded before {stage} stage")
+
+    def timeout(self, stage: str) -> float | None:
+        """Return the timeout to use for ``stage``, checking the deadline first."""
+        self.check(stage)
+        limits = [self.stage_timeouts.get(stage), self.remaining()]
+        limits = [t for t in limits if t is not None]
+        return min(limits) if limits else None
+
+    def for_stage(self, stage: str) -> "Deadline":
+        """Return a deadline covering all calls made by one ``stage``.
+
+        Use it when a stage makes several calls so they share the stage
+        budget instead of each getting the whole of it. Cancellation is shared
+        with this deadline.
+        """
+        budget = self.timeout(stage)
+        sub = Deadline(None, self.stage_timeouts)
+        if budget is not None:
+            sub.expires_at = time.monotonic() + budget
+        sub._cancelled = self._cancelled
+        sub._lock = self._lock
+        sub._callbacks = self._callbacks
+        return sub
+
+    def child(self) -> "Deadline":
+        """Return a deadline for a sub-task that can be cancelled on its own.
+
+        The child expires with this deadline and is cancelled when this one
+        is, but cancelling the child leaves this deadline running. Fan-out
+        runs use it to stop sibling tasks after one fails.
+        """
+        sub = Deadline(None, self.stage_timeouts)
+        sub.expires_at = self.expires_at
+        self.on_cancel(sub.cancel)
+        return sub
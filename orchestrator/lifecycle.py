@@ -0,0 +1,100 @@
+import os
+import signal
+import threading
+from contextlib import contextmanager
+
+from .checkpoints import Checkpoint
+from .deadline import Deadline
+
+DEFAULT_GRACE_PERIOD = 30.0
+
+
+class ShuttingDown(Exception):
+    """Raised when new work is submitted while the server is draining."""
+
+
+class Lifecycle:
+    """Track in-flight pipelines and drain them on shutdown.
+
+    Once draining starts no new runs are accepted. Runs that do not finish
+    within the grace period are marked as interrupted in their checkpoint, so
+    another instance can resume them, and then cancelled.
+    """
+
+    def __init__(self) -> None:
+        self._idle = threading.Condition()
+        self._runs: dict[object, tuple[Deadline, Checkpoint | None]] = {}
+        self._drain_started = False
+        self.draining = False
+
+    @property
+    def in_flight(self) -> int:
+        with self._idle:
+            return len(self._runs)
+
+    @contextmanager
+    def track(self, deadline: Deadline, checkpoint: Checkpoint | None = None):
+        key = object()
+        with self._idle:
+            if self.draining:
+                raise ShuttingDown("Server is shutting down")
+            self._runs[key] = (deadline, checkpoint)
+        try:
+            yield
+        finally:
+            with self._idle:
+                del self._runs[key]
+                self._idle.notify_all()
+
+    def drain(self, grace_period: float = DEFAULT_GRACE_PERIOD) -> int:
+        """Stop accepting runs and wait for in-flight ones.
+
+        Returns the number of runs that had to be handed off. Only the first
+        call drains; later ones, e.g. the ASGI shutdown after a SIGTERM drain,
+        return 0 at once.
+        """
+        with self._idle:
+            if self._drain_started:
+                return 0
+            self._drain_started = True
+            self.draining = True
+            self._idle.wait_for(lambda: not self._runs, timeout=grace_period)
+            remaining = list(self._runs.values())
+        for deadline, checkpoint in remaining:
+            if checkpoint is not None:
+                checkpoint.interrupt()
+            deadline.cancel()
+        return len(remaining)
+
+    def install_signal_handler(
+        self, grace_period: float | None = None, signum: int = signal.SIGTERM
+    ) -> None:
+        """Drain on ``signum`` before handing it to the previous handler.
+
+        The previous handler (e.g. the ASGI server's) only runs once draining
+        finishes, so the server keeps serving readiness probes meanwhile. A
+        second signal during the drain goes straight to the previous handler.
+        Must be called from the main thread.
+        """
+        if grace_period is None:
+            grace_period = float(
+                os.environ.get("SHUTDOWN_GRACE_PERIOD", DEFAULT_GRACE_PERIOD)
+            )
+        previous = signal.getsignal(signum)
+        if previous is None:  # installed outside Python; treat as default
+            previous = signal.SIG_DFL
+
+        def forward() -> None:
+            self.drain(grace_period)
+            # Re-deliver the signal to the process so the previous handler
+            # runs in the main thread, or the default action terminates it.
+            os.kill(os.getpid(), signum)
+
+        def handler(signum, frame) -> None:
+            # Restore the previous handler here, in the main thread, so the
+            # re-delivered signal (or a second one) reaches it.
+            signal.signal(signum, previous)
+            self.draining = True
+            threading.Thread(target=forward, daemon=True).start()
+
+        signal.signal(signum, handler)
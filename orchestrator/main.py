@@ -1,24 +1,56 @@
 import argparse
+import json
+import logging
 import os
 import re
+import threading
+import time
+from contextlib import asynccontextmanager
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
 from pathlib import Path
 from datetime import datetime, timedelta
 import secrets
 
 import requests
 import base64
+from .blobstore import BlobStore
+from .checkpoints import (
+    Checkpoint,
+    interrupted_runs,
+    is_fingerprint,
+    request_fingerprint,
+    resume_stage,
+)
+from .deadline import Deadline, DeadlineExceeded, PipelineCancelled
+from .lifecycle import Lifecycle, ShuttingDown
+from .profiling import PipelineProfiler
 from .sources import fetch_wikipedia_extract, fetch_wikivoyage_extract
+from .transport import open_session
 
 try:
-    from fastapi import FastAPI, HTTPException, Header, Depends
+    from fastapi import FastAPI, HTTPException, Header, Depends, Request
     from fastapi.responses import FileResponse
     from fastapi.staticfiles import StaticFiles
     from pydantic import BaseModel
 except ModuleNotFoundError:  # pragma: no cover - optional dependency
     FastAPI = None
-    HTTPException = Exception
+
+    class HTTPException(Exception):  # pragma: no cover - minimal stub
+        def __init__(self, status_code: int, detail=None, headers=None) -> None:
+            super().__init__(status_code, detail)
+            self.status_code = status_code
+            self.detail = detail
+            self.headers = headers
+
     Header = lambda *a, **k: None  # type: ignore[misc]
     Depends = lambda x: None  # type: ignore[misc]
+    Request = None
     FileResponse = None
     StaticFiles = None
 
@@ -30,6 +62,11 @@ except ModuleNotFoundError:  # pragma: no cover - optional dependency
 TEMPLATE_DIR = Path(__file__).resolve().parent / "templates"
 OUTPUTS_DIR = Path(__file__).resolve().parent / "outputs"
 TEMPLATE_PATH = TEMPLATE_DIR / "story_prompt.txt"
+DISCONNECT_POLL_INTERVAL = 0.5
+RESUME_INTERVAL = 60.0
+LIFECYCLE = Lifecycle()
+
+logger = logging.getLogger(__name__)
 
 def slugify(value: str) -> str:
     value = value.lower()
@@ -42,6 +79,133 @@ def load_template() -> str:
         return f.read()
 
 
+def _write_output(
+    path: Path, data: bytes, deadline: Deadline, store: BlobStore
+) -> None:
+    """Store ``data`` as a blob and link it into place at ``path``.
+
+    Linking is atomic, so cancelled runs never leave partial files.
+    """
+    deadline.check("write")
+    blob = store.put(data)
+    if deadline.cancelled:
+        raise PipelineCancelled("Pipeline cancelled during write stage")
+    store.link(blob, path)
+
+
+def fetch_location_context(location: str, deadline: Deadline, session=None) -> str:
+    # Both lookups share one ``sources`` budget.
+    stage = deadline.for_stage("sources")
+    wiki = fetch_wikipedia_extract(
+        location, timeout=stage.timeout("sources"), session=session
+    )
+    voyage = fetch_wikivoyage_extract(
+        location, timeout=stage.timeout("sources"), session=session
+    )
+    info_parts = [wiki, voyage]
+    return "\n\n".join(p for p in info_parts if p)
+
+
+def _post(session, url: str, payload: dict, deadline: Deadline, stage: str):
+    http = session or requests
+    try:
+        response = http.post(url, json=payload, timeout=deadline.timeout(stage))
+    except requests.RequestException:
+        # A connection dropped by cancellation surfaces as a transport error.
+        deadline.check(stage)
+        raise
+    response.raise_for_status()
+    return response
+
+
+def generate_story(
+    formatted_prompt: str, llm_url: str, deadline: Deadline, session=None
+) -> str:
+    llm_response = _post(
+        session,
+        f"{llm_url.rstrip('/')}/generate",
+        {"inputs": formatted_prompt},
+        deadline,
+        "llm",
+    )
+    return llm_response.json().get("story") or llm_response.text
+
+
+def synthesize_speech(
+    text: str,
+    speaker: str,
+    tts_url: str,
+    tts_engine: str,
+    deadline: Deadline,
+    session=None,
+) -> bytes:
+    if tts_engine == "kokoro":
+        endpoint = f"{tts_url.rstrip('/')}/api/kokoro"
+    else:
+        endpoint = f"{tts_url.rstrip('/')}/api/tts"
+
+    tts_response = _post(
+        session, endpoint, {"text": text, "speaker": speaker}, deadline, "tts"
+    )
+    return tts_response.content
+
+
+def _outputs_root(output_base_dir: Path | str | None) -> Path:
+    base_dir = (
+        Path(output_base_dir)
+        if output_base_dir is not None
+        else OUTPUTS_DIR.parent
+    )
+    return base_dir / "outputs"
+
+
+def _profile_dir(output_dir: Path) -> Path:
+    """Return where profiles for ``output_dir`` go, outside the public mount."""
+    return output_dir.parent.parent / "profiles" / output_dir.name
+
+
+def _output_dir(prompt: str, output_base_dir: Path | str | None) -> Path:
+    output_dir = _outputs_root(output_base_dir) / slugify(prompt)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    return output_dir
+
+
+def story_fingerprint(
+    prompt: str,
+    language: str,
+    style: str,
+    tts_engine: str = "opentts",
+    location: str | None = None,
+) -> str:
+    return request_fingerprint(
+        prompt=prompt,
+        language=language,
+        style=style,
+        tts_engine=tts_engine,
+        location=location,
+        template=load_template(),
+    )
+
+
+def variants_fingerprint(
+    prompt: str,
+    languages: list[str],
+    voices: list[str],
+    style: str,
+    tts_engine: str = "opentts",
+    location: str | None = None,
+) -> str:
+    return request_fingerprint(
+        prompt=prompt,
+        languages=languages,
+        voices=voices,
+        style=style,
+        tts_engine=tts_engine,
+        location=location,
+        template=load_template(),
+    )
+
+
 def run_story(
     prompt: str,
     language: str,
@@ -51,51 +215,436 @@ def run_story(
     tts_engine: str = "opentts",
     location: str | None = None,
     output_base_dir: Path | str | None = None,
+    deadline: Deadline | None = None,
+    profiler: PipelineProfiler | None = None,
+    fingerprint: str | None = None,
 ):
-    template = load_template()
-    if location:
-        wiki = fetch_wikipedia_extract(location)
-        voyage = fetch_wikivoyage_extract(location)
-        info_parts = [wiki, voyage]
-        info = "\n\n".join(p for p in info_parts if p)
-        prompt = f"{prompt}\n\n{info}" if info else prompt
-        
-    formatted_prompt = template.format(prompt=prompt, language=language, style=style)
-
-    llm_response = requests.post(
-        f"{llm_url.rstrip('/')}/generate", json={"inputs": formatted_prompt}
-    )
-    llm_response.raise_for_status()
-    story_text = llm_response.json().get("story") or llm_response.text
-
-    slug = slugify(prompt)
-    base_dir = (
-        Path(output_base_dir)
-        if output_base_dir is not None
-        else OUTPUTS_DIR.parent
+    """Run the full pipeline, resuming from checkpoints of an unfinished run.
+
+    Each completed stage (context, prompt, story, audio) is checkpointed under
+    the request fingerprint, so a retry after e.g. a TTS failure does not pay
+    for LLM generation again. ``fingerprint`` selects an existing checkpoint
+    instead of deriving one from the request and current template.
+    """
+    if deadline is None:
+        deadline = Deadline.from_env()
+    if profiler is None:
+        profiler = PipelineProfiler(enabled=False)
+    if fingerprint is None:
+        fingerprint = story_fingerprint(prompt, language, style, tts_engine, location)
+    checkpoint = Checkpoint(_outputs_root(output_base_dir), fingerprint)
+    checkpoint.start(
+        {
+            "prompt": prompt,
+            "language": language,
+            "style": style,
+            "tts_engine": tts_engine,
+            "location": location,
+        }
     )
-    output_dir = base_dir / "outputs" / slug
-    output_dir.mkdir(parents=True, exist_ok=True)
+    session = open_session(deadline)
+    try:
+        if location:
+            with profiler.stage("sources"):
+                info = resume_stage(
+                    checkpoint,
+                    "context",
+                    lambda: fetch_location_context(
+                        location, deadline, session
+                    ).encode("utf-8"),
+                ).decode("utf-8")
+                prompt = f"{prompt}\n\n{info}" if info else prompt
 
-    md_path = output_dir / "story.md"
-    with open(md_path, "w", encoding="utf-8") as f:
-        f.write(story_text)
+        with profiler.stage("prompt"):
+            formatted_prompt = resume_stage(
+                checkpoint,
+                "prompt",
+                lambda: load_template()
+                .format(prompt=prompt, language=language, style=style)
+                .encode("utf-8"),
+            ).decode("utf-8")
 
-    if tts_engine == "kokoro":
-        endpoint = f"{tts_url.rstrip('/')}/api/kokoro"
-    else:
-        endpoint = f"{tts_url.rstrip('/')}/api/tts"
+        with profiler.stage("llm"):
+            story_text = resume_stage(
+                checkpoint,
+                "story",
+                lambda: generate_story(
+                    formatted_prompt, llm_url, deadline, session
+                ).encode("utf-8"),
+            ).decode("utf-8")
+
+        with profiler.stage("write_text"):
+            output_dir = _output_dir(prompt, output_base_dir)
+            store = BlobStore(output_dir.parent)
+            md_path = output_dir / "story.md"
+            _write_output(md_path, story_text.encode("utf-8"), deadline, store)
 
-    tts_response = requests.post(
-        endpoint,
-        json={"text": story_text, "speaker": language},
+        with profiler.stage("tts"):
+            audio_bytes = resume_stage(
+                checkpoint,
+                "audio",
+                lambda: synthesize_speech(
+                    story_text, language, tts_url, tts_engine, deadline, session
+                ),
+            )
+
+        with profiler.stage("write_audio"):
+            audio_path = output_dir / "story.mp3"
+            _write_output(audio_path, audio_bytes, deadline, store)
+    finally:
+        session.close()
+
+    checkpoint.finish()
+    return md_path, audio_path, story_text, audio_bytes
+
+
+def retry_story(
+    fingerprint: str,
+    llm_url: str,
+    tts_url: str,
+    output_base_dir: Path | str | None = None,
+    deadline: Deadline | None = None,
+    profiler: PipelineProfiler | None = None,
+):
+    """Resume a failed or interrupted run from its first unfinished stage.
+
+    The run keeps its stored fingerprint, so checkpointed stages such as the
+    formatted prompt are reused even if the prompt template changed since.
+    Fan-out runs are resumed with :func:`run_story_variants` and return its
+    list of variants. Raises ``LookupError`` when no unfinished run exists for
+    ``fingerprint``.
+    """
+    state = Checkpoint(_outputs_root(output_base_dir), fingerprint).state()
+    if state is None:
+        raise LookupError(f"No unfinished run with fingerprint {fingerprint}")
+    run = run_story_variants if "languages" in state["params"] else run_story
+    return run(
+        llm_url=llm_url,
+        tts_url=tts_url,
+        output_base_dir=output_base_dir,
+        deadline=deadline,
+        profiler=profiler,
+        fingerprint=fingerprint,
+        **state["params"],
     )
-    tts_response.raise_for_status()
-    audio_path = output_dir / "story.mp3"
-    with open(audio_path, "wb") as f:
-        f.write(tts_response.content)
 
-    return md_path, audio_path, story_text, tts_response.content
+
+def unique_variants(names: list[str], kind: str) -> list[str]:
+    """Drop repeated ``names`` and reject ones that share an output slug.
+
+    Variants are stored under ``slugify(name)``, so ``en-US`` and ``en_us``
+    would overwrite each other; a ``ValueError`` is raised instead.
+    """
+    names = list(dict.fromkeys(names))
+    seen: dict[str, str] = {}
+    for name in names:
+        slug = slugify(name)
+        if slug in seen:
+            raise ValueError(
+                f"{kind} names {seen[slug]!r} and {name!r} both map to {slug!r}"
+            )
+        seen[slug] = name
+    return names
+
+
+def run_story_variants(
+    prompt: str,
+    languages: list[str],
+    style: str,
+    llm_url: str,
+    tts_url: str,
+    voices: list[str] | None = None,
+    tts_engine: str = "opentts",
+    location: str | None = None,
+    output_base_dir: Path | str | None = None,
+    deadline: Deadline | None = None,
+    profiler: PipelineProfiler | None = None,
+    max_workers: int | None = None,
+    fingerprint: str | None = None,
+):
+    """Render one prompt in several languages and voices.
+
+    Location context is fetched once, stories for all languages are generated
+    concurrently and each finished text is synthesized with every voice in
+    parallel. When ``voices`` is empty the language is used as the speaker,
+    like :func:`run_story`. Variants are stored under a single
+    ``outputs/{slug}/`` entry as ``{language}/story.md`` and
+    ``{language}/{voice}.mp3``. Repeated languages and voices are rendered
+    once; names that collide after slugifying raise ``ValueError`` before any
+    work starts.
+
+    Like :func:`run_story`, the run is checkpointed under ``fingerprint``
+    (derived from the request by default): each language's prompt and story
+    and each voice's audio, so a retry only redoes the variants that failed.
+
+    Returns a list with one dict per language holding ``language``, ``text``,
+    ``markdown`` and ``audio`` (a mapping of voice to ``(path, bytes)``).
+    """
+    if deadline is None:
+        deadline = Deadline.from_env()
+    if profiler is None:
+        profiler = PipelineProfiler(enabled=False)
+    if max_workers is None:
+        max_workers = int(os.environ.get("FANOUT_WORKERS", "4"))
+    languages = unique_variants(languages, "Language")
+    voices = unique_variants(voices or [], "Voice")
+    if fingerprint is None:
+        fingerprint = variants_fingerprint(
+            prompt, languages, voices, style, tts_engine, location
+        )
+    checkpoint = Checkpoint(_outputs_root(output_base_dir), fingerprint)
+    checkpoint.start(
+        {
+            "prompt": prompt,
+            "languages": languages,
+            "voices": voices,
+            "style": style,
+            "tts_engine": tts_engine,
+            "location": location,
+        }
+    )
+    # Failing tasks cancel only this run's siblings, not the caller's deadline.
+    fanout = deadline.child()
+    session = open_session(fanout)
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def story_task(language: str, formatted_prompt: str) -> str:
+        return resume_stage(
+            checkpoint,
+            f"story-{slugify(language)}",
+            lambda: generate_story(
+                formatted_prompt, llm_url, fanout, session
+            ).encode("utf-8"),
+        ).decode("utf-8")
+
+    def audio_task(language: str, voice: str, story_text: str) -> bytes:
+        return resume_stage(
+            checkpoint,
+            f"audio-{slugify(language)}-{slugify(voice)}",
+            lambda: synthesize_speech(
+                story_text, voice, tts_url, tts_engine, fanout, session
+            ),
+        )
+
+    try:
+        if location:
+            with profiler.stage("sources"):
+                info = resume_stage(
+                    checkpoint,
+                    "context",
+                    lambda: fetch_location_context(
+                        location, fanout, session
+                    ).encode("utf-8"),
+                ).decode("utf-8")
+                prompt = f"{prompt}\n\n{info}" if info else prompt
+
+        with profiler.stage("prompt"):
+            template = load_template()
+            prompts = {
+                language: resume_stage(
+                    checkpoint,
+                    f"prompt-{slugify(language)}",
+                    lambda: template.format(
+                        prompt=prompt, language=language, style=style
+                    ).encode("utf-8"),
+                ).decode("utf-8")
+                for language in languages
+            }
+            output_dir = _output_dir(prompt, output_base_dir)
+            store = BlobStore(output_dir.parent)
+
+        variants = {
+            language: {"language": language, "audio": {}} for language in languages
+        }
+        # Each task is profiled on the worker thread that runs it.
+        llm_futures = {
+            executor.submit(
+                profiler.wrap(f"llm-{slugify(language)}", story_task),
+                language,
+                prompts[language],
+            ): language
+            for language in languages
+        }
+        tts_futures = {}
+        for future in as_completed(llm_futures):
+            language = llm_futures[future]
+            story_text = future.result()
+            variant_dir = output_dir / slugify(language)
+            variant_dir.mkdir(exist_ok=True)
+            md_path = variant_dir / "story.md"
+            with profiler.stage(f"write_text-{slugify(language)}"):
+                _write_output(md_path, story_text.encode("utf-8"), fanout, store)
+            variants[language].update(text=story_text, markdown=md_path)
+            for voice in voices or [language]:
+                tts_future = executor.submit(
+                    profiler.wrap(
+                        f"tts-{slugify(language)}-{slugify(voice)}", audio_task
+                    ),
+                    language,
+                    voice,
+                    story_text,
+                )
+                tts_futures[tts_future] = (language, voice, variant_dir)
+
+        for future in as_completed(tts_futures):
+            language, voice, variant_dir = tts_futures[future]
+            audio_bytes = future.result()
+            audio_path = variant_dir / f"{slugify(voice)}.mp3"
+            with profiler.stage(f"write_audio-{slugify(language)}-{slugify(voice)}"):
+                _write_output(audio_path, audio_bytes, fanout, store)
+            variants[language]["audio"][voice] = (audio_path, audio_bytes)
+    except BaseException:
+        # Stop the remaining generations so their capacity is released.
+        fanout.cancel()
+        raise
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        session.close()
+
+    results = [variants[language] for language in languages]
+    for v in results:
+        v["audio"] = {voice: v["audio"][voice] for voice in voices or [v["language"]]}
+    manifest = {
+        "prompt": prompt,
+        "style": style,
+        "variants": [
+            {
+                "language": v["language"],
+                "markdown": str(v["markdown"].relative_to(output_dir)),
+                "audio": {
+                    voice: str(path.relative_to(output_dir))
+                    for voice, (path, _) in v["audio"].items()
+                },
+            }
+            for v in results
+        ],
+    }
+    _write_output(
+        output_dir / "variants.json",
+        json.dumps(manifest, indent=2).encode("utf-8"),
+        deadline,
+        store,
+    )
+    checkpoint.finish()
+    return results
+
+
+def _disconnect_probe(http_request):
+    """Return a callable reporting whether the client of ``http_request`` left.
+
+    Must be created and called from a FastAPI worker thread.
+    """
+    if http_request is None:
+        return None
+
+    from anyio.from_thread import run as run_async
+
+    return lambda: run_async(http_request.is_disconnected)
+
+
+def run_until_disconnect(
+    is_disconnected,
+    deadline: Deadline,
+    pipeline,
+    checkpoint: Checkpoint | None = None,
+    lifecycle: Lifecycle = LIFECYCLE,
+    **kwargs,
+):
+    """Run ``pipeline`` and cancel it if the HTTP client disconnects.
+
+    The pipeline runs in its own thread, tracked by ``lifecycle`` until that
+    thread exits, while this one polls ``is_disconnected``. On disconnect the
+    deadline is cancelled, which drops the run's backend connections. Raises
+    ``PipelineCancelled`` as soon as the deadline is cancelled, e.g. by a drain.
+    """
+    future = Future()
+    cancelled = Future()
+    deadline.on_cancel(lambda: cancelled.set_result(None))
+
+    def target() -> None:
+        try:
+            with lifecycle.track(deadline, checkpoint):
+                result = pipeline(deadline=deadline, **kwargs)
+        except BaseException as exc:
+            future.set_exception(exc)
+        else:
+            future.set_result(result)
+
+    threading.Thread(target=target, daemon=True).start()
+    while True:
+        done, _ = wait(
+            [future, cancelled],
+            timeout=DISCONNECT_POLL_INTERVAL,
+            return_when=FIRST_COMPLETED,
+        )
+        # A pipeline that failed on its own may have cancelled its deadline
+        # on the way out; report its error rather than the cancellation.
+        if future.done():
+            return future.result()
+        if cancelled in done:
+            raise PipelineCancelled("Pipeline cancelled")
+        if is_disconnected is not None and is_disconnected():
+            deadline.cancel()
+            raise PipelineCancelled("Client disconnected")
+
+
+def resume_interrupted_runs(
+    llm_url: str,
+    tts_url: str,
+    output_base_dir: Path | str | None = None,
+    lifecycle: Lifecycle = LIFECYCLE,
+) -> int:
+    """Resume runs handed off by a draining instance; return how many ran.
+
+    Each run is claimed first so that several instances sharing the outputs
+    directory never resume the same run twice.
+    """
+    resumed = 0
+    for checkpoint in interrupted_runs(_outputs_root(output_base_dir)):
+        if lifecycle.draining or not checkpoint.claim():
+            continue
+        # Another instance may have resumed it since the scan. A running
+        # run claimed here had its previous claim expire with its resumer.
+        if (checkpoint.state() or {}).get("status") not in ("interrupted", "running"):
+            checkpoint.release()
+            continue
+        deadline = Deadline.from_env()
+        try:
+            with lifecycle.track(deadline, checkpoint):
+                retry_story(
+                    checkpoint.fingerprint,
+                    llm_url=llm_url,
+                    tts_url=tts_url,
+                    output_base_dir=output_base_dir,
+                    deadline=deadline,
+                )
+            resumed += 1
+        except Exception:
+            logger.exception("Resuming run %s failed", checkpoint.fingerprint)
+        finally:
+            checkpoint.release()
+    return resumed
+
+
+def watch_interrupted_runs(
+    llm_url: str,
+    tts_url: str,
+    interval: float = RESUME_INTERVAL,
+    output_base_dir: Path | str | None = None,
+    lifecycle: Lifecycle = LIFECYCLE,
+) -> None:
+    """Resume interrupted runs every ``interval`` seconds until draining.
+
+    Runs handed off while this instance is up, or whose claim expired after
+    the resuming instance died, are picked up on a later scan.
+    """
+    while not lifecycle.draining:
+        try:
+            resume_interrupted_runs(llm_url, tts_url, output_base_dir, lifecycle)
+        except Exception:
+            logger.exception("Scanning for interrupted runs failed")
+        time.sleep(interval)
+
 
 def main():
     parser = argparse.ArgumentParser(description="Generate a story and TTS audio")
@@ -122,8 +671,60 @@ def main():
         default=os.environ.get("TTS_ENGINE", "opentts"),
         help="Text-to-speech engine to use",
     )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        help="Overall deadline in seconds for the whole pipeline",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Write per-stage CPU and memory profiles next to the outputs",
+    )
+    parser.add_argument(
+        "--extra-language",
+        action="append",
+        default=[],
+        help="Also render the story in this language (repeatable)",
+    )
+    parser.add_argument(
+        "--voice",
+        action="append",
+        default=[],
+        help="Synthesize each story with this voice (repeatable)",
+    )
     args = parser.parse_args()
 
+    profiler = PipelineProfiler(enabled=args.profile)
+    if args.extra_language or args.voice:
+        try:
+            languages = unique_variants(
+                [args.language, *args.extra_language], "Language"
+            )
+            voices = unique_variants(args.voice, "Voice")
+        except ValueError as exc:
+            parser.error(str(exc))
+        variants = run_story_variants(
+            prompt=args.prompt,
+            languages=languages,
+            style=args.style,
+            llm_url=args.llm_url,
+            tts_url=args.tts_url,
+            voices=voices,
+            tts_engine=args.tts_engine,
+            location=args.location,
+            deadline=Deadline.from_env(args.timeout),
+            profiler=profiler,
+        )
+        for variant in variants:
+            print(f"Markdown saved to {variant['markdown']}")
+            for audio_path, _ in variant["audio"].values():
+                print(f"Audio saved to {audio_path}")
+        if args.profile:
+            output_dir = variants[0]["markdown"].parent.parent
+            print(f"Profile saved to {profiler.dump(_profile_dir(output_dir))}")
+        return
+
     md_path, audio_path, _, _ = run_story(
         prompt=args.prompt,
         language=args.language,
@@ -132,10 +733,15 @@ def main():
         tts_url=args.tts_url,
         tts_engine=args.tts_engine,
         location=args.location,
+        deadline=Deadline.from_env(args.timeout),
+        profiler=profiler,
     )
 
     print(f"Markdown saved to {md_path}")
     print(f"Audio saved to {audio_path}")
+    if args.profile:
+        profile_dir = profiler.dump(_profile_dir(md_path.parent))
+        print(f"Profile saved to {profile_dir}")
 
 
 class StoryRequest(BaseModel):
@@ -144,6 +750,9 @@ class StoryRequest(BaseModel):
     style: str
     tts_engine: str = "opentts"
     location: str | None = None
+    timeout: float | None = None
+    languages: list[str] | None = None
+    voices: list[str] | None = None
 
 
 class LoginRequest(BaseModel):
@@ -172,8 +781,95 @@ def require_token(x_token: str = Header(..., alias="X-Token")) -> str:  # pragma
     return x_token
 
 
+def _pipeline_http_error(exc: Exception, fingerprint: str | None = None):
+    if isinstance(exc, PipelineCancelled):
+        # Runs cancelled by a draining server can be retried elsewhere.
+        status_code = 503 if LIFECYCLE.draining else 499
+    elif isinstance(exc, (DeadlineExceeded, requests.Timeout)):
+        status_code = 504
+    else:
+        status_code = 502
+    detail = str(exc)
+    if fingerprint is not None:
+        # Lets the client resume the run via /story/{fingerprint}/retry.
+        detail = {"error": detail, "fingerprint": fingerprint}
+    return HTTPException(status_code=status_code, detail=detail)
+
+
+def _story_response(md_path, audio_path, story_text, audio_bytes, profiler):
+    with profiler.stage("encode"):
+        encoded = base64.b64encode(audio_bytes).decode()
+    response = {
+        "markdown": str(md_path),
+        "audio": str(audio_path),
+        "text": story_text,
+        "audio_base64": encoded,
+    }
+    if profiler.enabled:
+        response["profile"] = str(profiler.dump(_profile_dir(md_path.parent)))
+    return response
+
+
+def _variants_response(variants, profiler):
+    with profiler.stage("encode"):
+        variant_payloads = [
+            {
+                "language": v["language"],
+                "markdown": str(v["markdown"]),
+                "text": v["text"],
+                "audio": [
+                    {
+                        "voice": voice,
+                        "audio": str(path),
+                        "audio_base64": base64.b64encode(data).decode(),
+                    }
+                    for voice, (path, data) in v["audio"].items()
+                ],
+            }
+            for v in variants
+        ]
+    # Keep the single-story fields pointing at the first variant.
+    first = variant_payloads[0]
+    response = {
+        "markdown": first["markdown"],
+        "audio": first["audio"][0]["audio"],
+        "text": first["text"],
+        "audio_base64": first["audio"][0]["audio_base64"],
+        "variants": variant_payloads,
+    }
+    if profiler.enabled:
+        output_dir = variants[0]["markdown"].parent.parent
+        response["profile"] = str(profiler.dump(_profile_dir(output_dir)))
+    return response
+
+
+@asynccontextmanager
+async def lifespan(app):
+    grace_period = float(os.environ.get("SHUTDOWN_GRACE_PERIOD", "30"))
+    try:
+        LIFECYCLE.install_signal_handler(grace_period)
+    except ValueError:  # pragma: no cover - not running in the main thread
+        logger.warning("SIGTERM drain handler not installed")
+    if os.environ.get("RESUME_INTERRUPTED", "1") != "0":
+        threading.Thread(
+            target=watch_interrupted_runs,
+            args=(
+                os.environ.get("LLM_SERVER_URL", "http://localhost:8080"),
+                os.environ.get("TTS_SERVER_URL", "http://localhost:5500"),
+                float(os.environ.get("RESUME_INTERVAL", RESUME_INTERVAL)),
+            ),
+            daemon=True,
+        ).start()
+    yield
+    from anyio import to_thread
+
+    # Drain off the event loop so it keeps serving while runs finish. A no-op
+    # when the SIGTERM handler already drained.
+    await to_thread.run_sync(LIFECYCLE.drain, grace_period)
+
+
 if FastAPI is not None:
-    app = FastAPI()
+    app = FastAPI(lifespan=lifespan)
     app.mount("/outputs", StaticFiles(directory=OUTPUTS_DIR), name="outputs")
 
     @app.get("/")
@@ -188,30 +884,159 @@ if FastAPI is not None:
             return {"token": _generate_token()}
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
+    @app.get("/healthz")
+    def healthz():
+        return {"status": "ok"}
+
+    @app.get("/readyz")
+    def readyz():
+        if LIFECYCLE.draining:
+            raise HTTPException(status_code=503, detail="draining")
+        return {"status": "ready", "in_flight": LIFECYCLE.in_flight}
+
     @app.post("/story")
-    def create_story(request: StoryRequest, token: str = Depends(require_token)):
+    def create_story(
+        request: StoryRequest,
+        token: str = Depends(require_token),
+        http_request: Request = None,
+        x_profile: str | None = Header(None, alias="X-Profile"),
+    ):
+        profile = bool(x_profile) and x_profile.lower() not in ("0", "false", "no")
+        if profile and os.environ.get("ALLOW_PROFILING", "1") == "0":
+            raise HTTPException(status_code=403, detail="Profiling is disabled")
+        profiler = PipelineProfiler(enabled=profile)
         llm_url = os.environ.get("LLM_SERVER_URL", "http://localhost:8080")
         tts_url = os.environ.get("TTS_SERVER_URL", "http://localhost:5500")
         tts_engine = os.environ.get("TTS_ENGINE", request.tts_engine)
         try:
-            md_path, audio_path, story_text, audio_bytes = run_story(
-                prompt=request.prompt,
-                language=request.language,
-                style=request.style,
+            deadline = Deadline.from_env(request.timeout)
+        except ValueError as exc:
+            raise HTTPException(status_code=422, detail=str(exc))
+        fan_out = bool(request.languages or request.voices)
+        if fan_out:
+            try:
+                languages = unique_variants(
+                    request.languages or [request.language], "Language"
+                )
+                voices = unique_variants(request.voices or [], "Voice")
+            except ValueError as exc:
+                raise HTTPException(status_code=422, detail=str(exc))
+            fingerprint = variants_fingerprint(
+                request.prompt,
+                languages,
+                voices,
+                request.style,
+                tts_engine,
+                request.location,
+            )
+        else:
+            fingerprint = story_fingerprint(
+                request.prompt,
+                request.language,
+                request.style,
+                tts_engine,
+                request.location,
+            )
+        checkpoint = Checkpoint(_outputs_root(None), fingerprint)
+        is_disconnected = _disconnect_probe(http_request)
+        try:
+            if fan_out:
+                variants = run_until_disconnect(
+                    is_disconnected,
+                    deadline,
+                    run_story_variants,
+                    checkpoint=checkpoint,
+                    prompt=request.prompt,
+                    languages=languages,
+                    style=request.style,
+                    llm_url=llm_url,
+                    tts_url=tts_url,
+                    voices=voices,
+                    tts_engine=tts_engine,
+                    location=request.location,
+                    profiler=profiler,
+                )
+            else:
+                md_path, audio_path, story_text, audio_bytes = run_until_disconnect(
+                    is_disconnected,
+                    deadline,
+                    run_story,
+                    checkpoint=checkpoint,
+                    prompt=request.prompt,
+                    language=request.language,
+                    style=request.style,
+                    llm_url=llm_url,
+                    tts_url=tts_url,
+                    tts_engine=tts_engine,
+                    location=request.location,
+                    profiler=profiler,
+                )
+        except ShuttingDown as exc:
+            raise HTTPException(
+                status_code=503, detail=str(exc), headers={"Retry-After": "5"}
+            )
+        except (PipelineCancelled, DeadlineExceeded, requests.RequestException) as exc:
+            raise _pipeline_http_error(exc, fingerprint)
+        if not fan_out:
+            return _story_response(
+                md_path, audio_path, story_text, audio_bytes, profiler
+            )
+        return _variants_response(variants, profiler)
+
+    @app.post("/story/{fingerprint}/retry")
+    def retry_failed_story(
+        fingerprint: str,
+        token: str = Depends(require_token),
+        http_request: Request = None,
+    ):
+        if not is_fingerprint(fingerprint):
+            raise HTTPException(status_code=422, detail="Invalid fingerprint")
+        llm_url = os.environ.get("LLM_SERVER_URL", "http://localhost:8080")
+        tts_url = os.environ.get("TTS_SERVER_URL", "http://localhost:5500")
+        profiler = PipelineProfiler(enabled=False)
+        deadline = Deadline.from_env()
+        checkpoint = Checkpoint(_outputs_root(None), fingerprint)
+        if checkpoint.state() is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"No unfinished run with fingerprint {fingerprint}",
+            )
+        # Claimed like a handed-off run, so no other retry or instance resumes
+        # it concurrently.
+        if not checkpoint.claim():
+            raise HTTPException(status_code=409, detail="Run is already being resumed")
+
+        def claimed_retry(**kwargs):
+            # Released when the pipeline thread ends, not when the client
+            # leaves; if this instance dies the claim expires instead.
+            try:
+                return retry_story(**kwargs)
+            finally:
+                checkpoint.release()
+
+        try:
+            result = run_until_disconnect(
+                _disconnect_probe(http_request),
+                deadline,
+                claimed_retry,
+                checkpoint=checkpoint,
+                fingerprint=fingerprint,
                 llm_url=llm_url,
                 tts_url=tts_url,
-                tts_engine=tts_engine,
-                location=request.location,
+                profiler=profiler,
             )
-        except requests.RequestException as exc:
-            raise HTTPException(status_code=502, detail=str(exc))
-        encoded = base64.b64encode(audio_bytes).decode()
-        return {
-            "markdown": str(md_path),
-            "audio": str(audio_path),
-            "text": story_text,
-            "audio_base64": encoded,
-        }
+        except ShuttingDown as exc:
+            checkpoint.release()
+            raise HTTPException(
+                status_code=503, detail=str(exc), headers={"Retry-After": "5"}
+            )
+        except LookupError as exc:
+            raise HTTPException(status_code=404, detail=str(exc))
+        except (PipelineCancelled, DeadlineExceeded, requests.RequestException) as exc:
+            raise _pipeline_http_error(exc, fingerprint)
+        if isinstance(result, list):
+            return _variants_response(result, profiler)
+        return _story_response(*result, profiler)
 else:  # pragma: no cover - FastAPI not available
     app = None
 
@@ -0,0 +1,153 @@
+import cProfile
+import json
+import threading
+import time
+import tracemalloc
+import weakref
+from contextlib import contextmanager
+from pathlib import Path
+
+# tracemalloc is process-wide: it runs while any profiled request is open.
+_TRACING_LOCK = threading.Lock()
+_tracing_users = 0
+_started_tracing = False
+
+
+def _acquire_tracing() -> None:
+    global _tracing_users, _started_tracing
+    with _TRACING_LOCK:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(25)
+            _started_tracing = True
+        _tracing_users += 1
+
+
+def _release_tracing() -> None:
+    global _tracing_users, _started_tracing
+    with _TRACING_LOCK:
+        _tracing_users -= 1
+        if _tracing_users == 0 and _started_tracing:
+            tracemalloc.stop()
+            _started_tracing = False
+
+
+class PipelineProfiler:
+    """Collect per-stage wall/CPU profiles and allocation snapshots.
+
+    Each stage produces a ``<n>-<stage>.prof`` file (pstats format, readable by
+    ``python -m pstats``, snakeviz or gprof2dot) and a ``<n>-<stage>.tracemalloc``
+    snapshot (readable with ``tracemalloc.Snapshot.load``). ``summary.json``
+    lists wall time, CPU time and traced memory per stage.
+
+    Stages never wait on each other: cProfile profiles the thread running the
+    stage, and tracemalloc runs from the first stage until :meth:`close` (or
+    :meth:`dump`). Because tracemalloc is shared by concurrent stages,
+    ``peak_bytes`` is the process-wide traced peak so far, while
+    ``allocated_bytes`` is the change in traced memory over the stage.
+    """
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self.stages: list[dict] = []
+        self._lock = threading.Lock()
+        self._release = None
+
+    @property
+    def _tracing(self) -> bool:
+        return self._release is not None and self._release.alive
+
+    def _start_tracing(self) -> None:
+        with self._lock:
+            if not self._tracing:
+                _acquire_tracing()
+                # Also released if the profiler is dropped without close(),
+                # e.g. when the request fails before its profile is dumped.
+                self._release = weakref.finalize(self, _release_tracing)
+
+    def close(self) -> None:
+        """Stop tracing memory for this profiler; safe to call twice."""
+        with self._lock:
+            if self._release is not None:
+                self._release()
+
+    @contextmanager
+    def stage(self, name: str):
+        if not self.enabled:
+            yield
+            return
+        self._start_tracing()
+        memory_start, _ = tracemalloc.get_traced_memory()
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ allows one active cProfile at a time.
+            profile = None
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+            wall = time.perf_counter() - wall_start
+            cpu = time.thread_time() - cpu_start
+            memory_end, peak = tracemalloc.get_traced_memory()
+            # None if the profiler was closed while this stage still ran.
+            snapshot = tracemalloc.take_snapshot() if self._tracing else None
+            self.stages.append(
+                {
+                    "stage": name,
+                    "wall_seconds": wall,
+                    "cpu_seconds": cpu,
+                    "allocated_bytes": memory_end - memory_start,
+                    "peak_bytes": peak,
+                    "profile": profile,
+                    "snapshot": snapshot,
+                }
+            )
+
+    def wrap(self, name: str, func):
+        """Return ``func`` wrapped so each call is profiled as stage ``name``.
+
+        Use it for work submitted to a thread pool: the profile is then taken
+        on the worker thread that does the work, not on the thread waiting
+        for it.
+        """
+
+        def profiled(*args, **kwargs):
+            with self.stage(name):
+                return func(*args, **kwargs)
+
+        return profiled
+
+    def dump(self, directory: Path | str) -> Path:
+        """Write all collected stages to ``directory`` and return it.
+
+        Memory tracing for this profiler stops first.
+        """
+        self.close()
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        summary = []
+        for index, entry in enumerate(self.stages):
+            prefix = f"{index:02d}-{entry['stage']}"
+            item = {
+                "stage": entry["stage"],
+                "wall_seconds": round(entry["wall_seconds"], 6),
+                "cpu_seconds": round(entry["cpu_seconds"], 6),
+                "allocated_bytes": entry["allocated_bytes"],
+                "peak_bytes": entry["peak_bytes"],
+                "profile": None,
+                "tracemalloc": None,
+            }
+            if entry["profile"] is not None:
+                entry["profile"].dump_stats(str(directory / f"{prefix}.prof"))
+                item["profile"] = f"{prefix}.prof"
+            if entry["snapshot"] is not None:
+                entry["snapshot"].dump(str(directory / f"{prefix}.tracemalloc"))
+                item["tracemalloc"] = f"{prefix}.tracemalloc"
+            summary.append(item)
+        with open(directory / "summary.json", "w", encoding="utf-8") as f:
+            json.dump({"stages": summary}, f, indent=2)
+        return directory
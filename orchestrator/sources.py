@@ -2,16 +2,21 @@ import requests
 from urllib.parse import quote
 
 
-def fetch_wikipedia_extract(title: str) -> str:
+def fetch_wikipedia_extract(
+    title: str, timeout: float | None = 10.0, session=None
+) -> str:
     """Return summary extract for a Wikipedia page title."""
     url = f"https://en.wikipedia.org/api/rest_v1/page/summary/{quote(title)}"
-    resp = requests.get(url, headers={"Accept": "application/json"})
+    http = session or requests
+    resp = http.get(url, headers={"Accept": "application/json"}, timeout=timeout)
     resp.raise_for_status()
     data = resp.json()
     return data.get("extract", "")
 
   
-def fetch_wikivoyage_extract(title: str) -> str:
+def fetch_wikivoyage_extract(
+    title: str, timeout: float | None = 10.0, session=None
+) -> str:
     """Return introductory extract for a Wikivoyage page title."""
     params = {
         "action": "query",
@@ -21,10 +26,12 @@ def fetch_wikivoyage_extract(title: str) -> str:
         "titles": title,
         "format": "json",
     }
-    resp = requests.get(
+    http = session or requests
+    resp = http.get(
         "https://en.wikivoyage.org/w/api.php",
         params=params,
         headers={"Accept": "application/json"},
+        timeout=timeout,
     )
     resp.raise_for_status()
     data = resp.json()
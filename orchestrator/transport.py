@@ -0,0 +1,71 @@
+import socket
+import threading
+
+import requests
+
+from .deadline import Deadline
+
+
+class _AbortableAdapter(requests.adapters.HTTPAdapter):
+    """HTTP adapter that remembers its open connections so they can be aborted.
+
+    ``Session.close()`` only drops idle pooled connections; a request blocked
+    waiting for TGI or TTS holds its connection outside the pool. Shutting
+    that socket down makes the blocked call fail at once, and the backend sees
+    the client go away.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        self._connections: set = set()
+        self._lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            scheme: self._tracking_pool(pool_cls)
+            for scheme, pool_cls in self.poolmanager.pool_classes_by_scheme.items()
+        }
+
+    def _tracking_pool(self, pool_cls):
+        adapter = self
+
+        class TrackingConnection(pool_cls.ConnectionCls):
+            def connect(self):
+                super().connect()
+                with adapter._lock:
+                    adapter._connections.add(self)
+
+            def close(self):
+                with adapter._lock:
+                    adapter._connections.discard(self)
+                super().close()
+
+        return type(pool_cls.__name__, (pool_cls,), {"ConnectionCls": TrackingConnection})
+
+    def abort(self) -> None:
+        with self._lock:
+            connections = list(self._connections)
+        for conn in connections:
+            sock = getattr(conn, "sock", None)
+            if sock is None:
+                continue
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+def open_session(deadline: Deadline) -> requests.Session:
+    """Return a session whose in-flight requests are dropped on cancellation."""
+    session = requests.Session()
+    adapter = _AbortableAdapter()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    def abort() -> None:
+        adapter.abort()
+        session.close()
+
+    deadline.on_cancel(abort)
+    return session
@@ -3,10 +3,13 @@ import json
 import os
 import sys
 import types
+from contextlib import contextmanager
 from pathlib import Path
 
 import base64
 
+import pytest
+
 from http.server import BaseHTTPRequestHandler, HTTPServer
 import threading
 
@@ -43,11 +46,22 @@ def _start_server(handler):
     return server, thread, f"http://localhost:{server.server_address[1]}"
 
 
+@contextmanager
 def _load_app(tmp_path: Path, llm_url: str, tts_url: str):
     requests_stub = '''\
 import json as _json
+import types as _types
 from urllib import request as _request
 
+class RequestException(Exception):
+    pass
+
+class HTTPError(RequestException):
+    pass
+
+class Timeout(RequestException):
+    pass
+
 class Response:
     def __init__(self, resp):
         self.content = resp.read()
@@ -55,7 +69,7 @@ class Response:
 
     def raise_for_status(self):
         if self.status_code >= 400:
-            raise Exception(self.status_code)
+            raise HTTPError(self.status_code)
 
     def json(self):
         try:
@@ -67,13 +81,31 @@ class Response:
     def text(self):
         return self.content.decode()
 
-def post(url, json=None):
+def post(url, json=None, timeout=None):
     data = None
     if json is not None:
         data = _json.dumps(json).encode()
     req = _request.Request(url, data=data, headers={'Content-Type': 'application/json'})
-    resp = _request.urlopen(req)
+    try:
+        resp = _request.urlopen(req, timeout=timeout)
+    except _request.HTTPError as exc:
+        resp = exc
     return Response(resp)
+
+class HTTPAdapter:
+    pass
+
+adapters = _types.SimpleNamespace(HTTPAdapter=HTTPAdapter)
+
+class Session:
+    def mount(self, prefix, adapter):
+        pass
+
+    def post(self, url, json=None, timeout=None):
+        return post(url, json=json, timeout=timeout)
+
+    def close(self):
+        pass
 '''
     (tmp_path / "requests.py").write_text(requests_stub)
 
@@ -81,17 +113,18 @@ def post(url, json=None):
     fastapi_mod = types.ModuleType("fastapi")
 
     class FastAPI:
-        def __init__(self):
-            self.endpoint = None
+        def __init__(self, **kwargs):
+            self.endpoints = {}
 
         def post(self, path):
             def decorator(fn):
-                self.endpoint = fn
+                self.endpoints[path] = fn
                 return fn
             return decorator
 
         def get(self, path):
             def decorator(fn):
+                self.endpoints[path] = fn
                 return fn
             return decorator
 
@@ -104,6 +137,16 @@ def post(url, json=None):
     def Depends(dep):
         return None
 
+    class Request:
+        pass
+
+    class HTTPException(Exception):
+        def __init__(self, status_code, detail=None, headers=None):
+            super().__init__(detail)
+            self.status_code = status_code
+            self.detail = detail
+            self.headers = headers
+
     class StaticFiles:
         def __init__(self, *args, **kwargs):
             pass
@@ -112,9 +155,10 @@ def post(url, json=None):
         return None
 
     fastapi_mod.FastAPI = FastAPI
-    fastapi_mod.HTTPException = Exception
+    fastapi_mod.HTTPException = HTTPException
     fastapi_mod.Header = Header
     fastapi_mod.Depends = Depends
+    fastapi_mod.Request = Request
     fastapi_mod.StaticFiles = StaticFiles
     fastapi_mod.FileResponse = FileResponse
 
@@ -142,31 +186,29 @@ def post(url, json=None):
     sys.path.insert(0, str(repo_root))
     sys.path.insert(0, str(tmp_path))
     try:
+        # Re-import the modules holding HTTP sessions so they use this stub.
+        for name in ("orchestrator.transport", "orchestrator.main"):
+            sys.modules.pop(name, None)
         main = importlib.import_module("orchestrator.main")
-        importlib.reload(main)
+        main.OUTPUTS_DIR = tmp_path / "outputs"
         os.environ["LLM_SERVER_URL"] = llm_url
         os.environ["TTS_SERVER_URL"] = tts_url
-        app = main.app
-        handler = app.endpoint
-        request_obj = main.StoryRequest(prompt="P", language="en", style="fun")
-        result = handler(request_obj)
-        out_dir = repo_root / "outputs"
-        if out_dir.exists():
-            import shutil
-            shutil.rmtree(out_dir)
+        yield main
     finally:
         sys.path.remove(str(tmp_path))
         sys.path.remove(str(repo_root))
         sys.modules.pop("fastapi", None)
         sys.modules.pop("pydantic", None)
-    return result
 
 
 def test_api_response(tmp_path):
     llm_server, llm_thread, llm_url = _start_server(_LLMHandler)
     tts_server, tts_thread, tts_url = _start_server(_TTSHandler)
     try:
-        result = _load_app(tmp_path, llm_url, tts_url)
+        with _load_app(tmp_path, llm_url, tts_url) as main:
+            handler = main.app.endpoints["/story"]
+            request_obj = main.StoryRequest(prompt="P", language="en", style="fun")
+            result = handler(request_obj)
     finally:
         llm_server.shutdown()
         llm_thread.join()
@@ -176,3 +218,149 @@ def test_api_response(tmp_path):
     assert result["text"] == "This is a test story."
     assert result["audio_base64"] == base64.b64encode(b"TESTMP3").decode()
 
+
+def test_readyz_reports_draining(tmp_path):
+    with _load_app(tmp_path, "http://unused", "http://unused") as main:
+        readyz = main.app.endpoints["/readyz"]
+        assert readyz() == {"status": "ready", "in_flight": 0}
+        main.LIFECYCLE.drain(grace_period=0)
+        with pytest.raises(main.HTTPException) as excinfo:
+            readyz()
+        with pytest.raises(main.HTTPException) as story_exc:
+            main.app.endpoints["/story"](
+                main.StoryRequest(prompt="P", language="en", style="fun")
+            )
+    assert excinfo.value.status_code == 503
+    assert story_exc.value.status_code == 503
+    assert story_exc.value.headers == {"Retry-After": "5"}
+
+
+def test_lifespan_drains_off_the_event_loop(tmp_path, monkeypatch):
+    anyio = pytest.importorskip("anyio")
+    release = threading.Event()
+    drained = []
+
+    def drain(grace_period):
+        # Only released by a task on the event loop, so a drain blocking the
+        # loop times out here.
+        drained.append(release.wait(5))
+        return 0
+
+    async def serve(main):
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(shutdown, main)
+            await anyio.sleep(0.05)
+            release.set()
+
+    async def shutdown(main):
+        async with main.lifespan(main.app):
+            pass
+
+    monkeypatch.setenv("RESUME_INTERRUPTED", "0")
+    with _load_app(tmp_path, "http://unused", "http://unused") as main:
+        monkeypatch.setattr(main.LIFECYCLE, "install_signal_handler", lambda *a: None)
+        monkeypatch.setattr(main.LIFECYCLE, "drain", drain)
+        anyio.run(serve, main)
+    assert drained == [True]
+
+
+def test_retry_endpoint(tmp_path):
+    tts_calls = []
+
+    class _FlakyTTSHandler(_TTSHandler):
+        def do_POST(self):
+            tts_calls.append(self.path)
+            if len(tts_calls) == 1:
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                self.send_response(500)
+                self.end_headers()
+                return
+            super().do_POST()
+
+    llm_server, llm_thread, llm_url = _start_server(_LLMHandler)
+    tts_server, tts_thread, tts_url = _start_server(_FlakyTTSHandler)
+    try:
+        with _load_app(tmp_path, llm_url, tts_url) as main:
+            retry = main.app.endpoints["/story/{fingerprint}/retry"]
+            with pytest.raises(main.HTTPException) as invalid:
+                retry("..")
+            with pytest.raises(main.HTTPException) as missing:
+                retry("0" * 64)
+            with pytest.raises(main.HTTPException) as failed:
+                main.app.endpoints["/story"](
+                    main.StoryRequest(prompt="P", language="en", style="fun")
+                )
+            fingerprint = failed.value.detail["fingerprint"]
+            # A run another retry or instance is resuming is not started twice.
+            holder = main.Checkpoint(main.OUTPUTS_DIR, fingerprint)
+            assert holder.claim()
+            with pytest.raises(main.HTTPException) as busy:
+                retry(fingerprint)
+            holder.release()
+            result = retry(fingerprint)
+    finally:
+        llm_server.shutdown()
+        llm_thread.join()
+        tts_server.shutdown()
+        tts_thread.join()
+
+    assert invalid.value.status_code == 422
+    assert missing.value.status_code == 404
+    assert failed.value.status_code == 502
+    assert busy.value.status_code == 409
+    assert len(tts_calls) == 2
+    assert result["text"] == "This is a test story."
+    assert result["audio_base64"] == base64.b64encode(b"TESTMP3").decode()
+
+
+def test_fanout_backend_error_is_502(tmp_path):
+    class _PickyTTSHandler(_TTSHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            if body.get("speaker") != "bad":
+                self.send_response(200)
+                self.end_headers()
+                self.wfile.write(b"TESTMP3")
+                return
+            self.send_response(500)
+            self.end_headers()
+
+    llm_server, llm_thread, llm_url = _start_server(_LLMHandler)
+    tts_server, tts_thread, tts_url = _start_server(_PickyTTSHandler)
+    try:
+        with _load_app(tmp_path, llm_url, tts_url) as main:
+            request_obj = main.StoryRequest(
+                prompt="P",
+                language="en",
+                style="fun",
+                languages=["en", "de"],
+                voices=["good", "bad"],
+            )
+            with pytest.raises(main.HTTPException) as excinfo:
+                main.app.endpoints["/story"](request_obj)
+            fingerprint = excinfo.value.detail["fingerprint"]
+            state = main.Checkpoint(main.OUTPUTS_DIR, fingerprint).state()
+            deadline = main.Deadline()
+            with pytest.raises(main.requests.HTTPError):
+                main.run_story_variants(
+                    prompt="P",
+                    languages=["en"],
+                    style="fun",
+                    llm_url=llm_url,
+                    tts_url=tts_url,
+                    voices=["good", "bad"],
+                    output_base_dir=tmp_path,
+                    deadline=deadline,
+                )
+    finally:
+        llm_server.shutdown()
+        llm_thread.join()
+        tts_server.shutdown()
+        tts_thread.join()
+
+    # One voice failing stops its siblings without cancelling the request.
+    assert excinfo.value.status_code == 502
+    assert not deadline.cancelled
+    # The failed fan-out run is checkpointed for /story/{fingerprint}/retry.
+    assert state["status"] == "failed"
+    assert state["params"]["voices"] == ["good", "bad"]
@@ -0,0 +1,117 @@
+import errno
+import os
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+repo_root = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(repo_root))
+
+from orchestrator.blobstore import BlobStore
+
+
+def _write(store: BlobStore, rel: str, data: bytes) -> Path:
+    dest = store.outputs_dir / rel
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    store.link(store.put(data), dest)
+    return dest
+
+
+def test_identical_outputs_share_one_blob(tmp_path):
+    store = BlobStore(tmp_path / "outputs")
+    a = _write(store, "a/story.mp3", b"AUDIO")
+    b = _write(store, "b/story.mp3", b"AUDIO")
+    _write(store, "b/story.md", b"text")
+
+    assert a.read_bytes() == b.read_bytes() == b"AUDIO"
+    assert a.stat().st_ino == b.stat().st_ino
+    counts = store.refcounts()
+    assert sorted(counts.values()) == [1, 2]
+
+    usage = store.usage()
+    assert usage["blobs"] == 2
+    assert usage["references"] == 3
+    assert usage["stored_bytes"] == len(b"AUDIO") + len(b"text")
+    assert usage["logical_bytes"] == 2 * len(b"AUDIO") + len(b"text")
+
+
+def test_overwrite_drops_old_reference_and_gc_collects(tmp_path):
+    store = BlobStore(tmp_path / "outputs")
+    dest = _write(store, "a/story.md", b"first")
+    _write(store, "a/story.md", b"second")
+
+    assert dest.read_bytes() == b"second"
+    assert store.usage()["unreferenced_blobs"] == 1
+    assert store.gc() == []  # still within the grace period
+
+    removed = store.gc(grace_seconds=-1)
+    assert len(removed) == 1
+    assert store.usage() == {
+        "blobs": 1,
+        "unreferenced_blobs": 0,
+        "references": 1,
+        "stored_bytes": len(b"second"),
+        "logical_bytes": len(b"second"),
+        "reclaimable_bytes": 0,
+    }
+
+
+def test_symlink_references_are_counted(tmp_path):
+    store = BlobStore(tmp_path / "outputs")
+    blob = store.put(b"AUDIO")
+    link = store.outputs_dir / "a" / "story.mp3"
+    link.parent.mkdir(parents=True)
+    link.symlink_to(Path("..") / ".blobs" / blob.parent.name / blob.name)
+
+    assert store.refcounts() == {blob: 1}
+    assert store.gc(grace_seconds=-1) == []
+
+
+def test_concurrent_writes(tmp_path):
+    store = BlobStore(tmp_path / "outputs")
+    errors = []
+
+    def worker(index):
+        try:
+            for round_ in range(20):
+                _write(store, "shared/story.mp3", b"AUDIO")
+                _write(store, f"own/{index}.md", f"{index}-{round_}".encode())
+        except Exception as exc:  # pragma: no cover - reported below
+            errors.append(exc)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    shared = store.outputs_dir / "shared" / "story.mp3"
+    assert shared.read_bytes() == b"AUDIO"
+    assert shared.stat().st_ino == store.put(b"AUDIO").stat().st_ino
+    assert not list(store.outputs_dir.rglob("*.tmp"))
+
+
+def test_symlink_fallback_only_when_hardlinks_unsupported(tmp_path, monkeypatch):
+    store = BlobStore(tmp_path / "outputs")
+    blob = store.put(b"AUDIO")
+    dest = store.outputs_dir / "a" / "story.mp3"
+    dest.parent.mkdir(parents=True)
+
+    def no_link(code):
+        def link(src, dst):
+            raise OSError(code, os.strerror(code))
+
+        return link
+
+    monkeypatch.setattr(os, "link", no_link(errno.EXDEV))
+    store.link(blob, dest)
+    assert dest.is_symlink() and dest.read_bytes() == b"AUDIO"
+
+    monkeypatch.setattr(os, "link", no_link(errno.ENOSPC))
+    with pytest.raises(OSError):
+        store.link(blob, store.outputs_dir / "b.mp3")
+    assert not (store.outputs_dir / "b.mp3").exists()
+    assert not list(store.outputs_dir.rglob("*.tmp"))
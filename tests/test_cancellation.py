@@ -0,0 +1,144 @@
+import importlib
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+repo_root = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture
+def real_main():
+    """Import ``orchestrator.main`` against the real ``requests`` package.
+
+    Other tests replace ``requests`` with stubs, so the modules are imported
+    fresh here and the previous ones are put back afterwards.
+    """
+
+    def ours(name):
+        return name.split(".")[0] in ("requests", "orchestrator")
+
+    saved = {name: mod for name, mod in sys.modules.items() if ours(name)}
+    for name in saved:
+        del sys.modules[name]
+    sys.path.insert(0, str(repo_root))
+    try:
+        pytest.importorskip("requests")
+        yield importlib.import_module("orchestrator.main")
+    finally:
+        sys.path.remove(str(repo_root))
+        for name in [name for name in sys.modules if ours(name)]:
+            del sys.modules[name]
+        sys.modules.update(saved)
+
+
+@pytest.fixture
+def hung_llm():
+    release = threading.Event()
+
+    class _HungHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            release.wait(10)
+            try:
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(json.dumps({"story": "late"}).encode())
+            except OSError:
+                pass
+
+        def log_message(self, *args):  # pragma: no cover
+            pass
+
+    server = ThreadingHTTPServer(("localhost", 0), _HungHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://localhost:{server.server_address[1]}"
+    release.set()
+    server.shutdown()
+    thread.join()
+
+
+def test_disconnect_cancels_backend_call(real_main, hung_llm, tmp_path):
+    lifecycle = real_main.Lifecycle()
+    deadline = real_main.Deadline(timeout=30)
+    polls = []
+
+    def is_disconnected():
+        polls.append(1)
+        return len(polls) >= 2
+
+    started = time.monotonic()
+    with pytest.raises(real_main.PipelineCancelled):
+        real_main.run_until_disconnect(
+            is_disconnected,
+            deadline,
+            real_main.run_story,
+            lifecycle=lifecycle,
+            prompt="P",
+            language="en",
+            style="fun",
+            llm_url=hung_llm,
+            tts_url=hung_llm,
+            output_base_dir=tmp_path,
+        )
+    assert deadline.cancelled
+    assert time.monotonic() - started < 5
+
+    # The blocked LLM call is aborted, so the pipeline thread exits promptly
+    # and stays tracked until it does.
+    for _ in range(50):
+        if lifecycle.in_flight == 0:
+            break
+        time.sleep(0.05)
+    assert lifecycle.in_flight == 0
+    assert time.monotonic() - started < 5
+
+
+def test_deadline_maps_to_504(real_main, hung_llm, tmp_path):
+    with pytest.raises(Exception) as excinfo:
+        real_main.run_story(
+            prompt="P",
+            language="en",
+            style="fun",
+            llm_url=hung_llm,
+            tts_url=hung_llm,
+            output_base_dir=tmp_path,
+            deadline=real_main.Deadline(timeout=0.3),
+        )
+    error = real_main._pipeline_http_error(excinfo.value)
+    assert error.status_code == 504
+
+
+def test_pipeline_error_mapping(real_main):
+    requests = sys.modules["requests"]
+    error = real_main._pipeline_http_error
+    assert error(real_main.PipelineCancelled("gone")).status_code == 499
+    assert error(real_main.DeadlineExceeded("late")).status_code == 504
+    assert error(requests.Timeout("slow")).status_code == 504
+    failed = error(requests.ConnectionError("down"), "f" * 64)
+    assert failed.status_code == 502
+    assert failed.detail == {"error": "down", "fingerprint": "f" * 64}
+
+
+def test_cancelled_deadline_returns_promptly(real_main):
+    deadline = real_main.Deadline(timeout=30)
+    release = threading.Event()
+    threading.Timer(0.05, deadline.cancel).start()
+
+    started = time.monotonic()
+    with pytest.raises(real_main.PipelineCancelled):
+        real_main.run_until_disconnect(
+            lambda: False,
+            deadline,
+            lambda deadline: release.wait(5),
+            lifecycle=real_main.Lifecycle(),
+        )
+    assert time.monotonic() - started < real_main.DISCONNECT_POLL_INTERVAL
+    release.set()
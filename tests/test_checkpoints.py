@@ -0,0 +1,62 @@
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+repo_root = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(repo_root))
+
+from orchestrator.blobstore import BlobStore
+from orchestrator.checkpoints import (
+    Checkpoint,
+    checkpoints_root,
+    expire_checkpoints,
+    resume_stage,
+)
+
+FINGERPRINT = "ab" * 32
+
+
+def test_invalid_fingerprint_rejected(tmp_path):
+    for value in ("..", "abc", "AB" * 32, "../" + "a" * 61):
+        with pytest.raises(ValueError):
+            Checkpoint(tmp_path / "outputs", value)
+
+
+def test_fail_after_finish_leaves_no_state(tmp_path):
+    checkpoint = Checkpoint(tmp_path / "outputs", FINGERPRINT)
+    checkpoint.start({"prompt": "p"})
+    checkpoint.finish()
+    checkpoint.fail("story", RuntimeError("late"))
+    assert checkpoint.state() is None
+    assert not checkpoint.state_path.exists()
+
+
+def test_state_without_params_is_missing(tmp_path):
+    checkpoint = Checkpoint(tmp_path / "outputs", FINGERPRINT)
+    checkpoint.directory.mkdir(parents=True)
+    checkpoint.state_path.write_text('{"status": "failed"}')
+    assert checkpoint.state() is None
+
+
+def test_expired_checkpoints_release_blobs(tmp_path):
+    checkpoint = Checkpoint(tmp_path / "outputs", FINGERPRINT)
+    checkpoint.start({"prompt": "p"})
+    resume_stage(checkpoint, "story", lambda: b"text")
+    checkpoint.fail("audio", RuntimeError("tts down"))
+    fresh = Checkpoint(tmp_path / "outputs", "cd" * 32)
+    fresh.start({"prompt": "q"})
+
+    store = BlobStore(tmp_path / "outputs", [checkpoints_root(tmp_path / "outputs")])
+    assert store.gc(grace_seconds=-1) == []
+    assert not checkpoint.directory.is_relative_to(store.outputs_dir)
+
+    assert expire_checkpoints(tmp_path / "outputs") == []
+    old = time.time() - 3600
+    os.utime(checkpoint.state_path, (old, old))
+    assert expire_checkpoints(tmp_path / "outputs", ttl_seconds=60) == [checkpoint.directory]
+    assert not checkpoint.directory.exists()
+    assert fresh.state() is not None
+    assert len(store.gc(grace_seconds=-1)) == 1
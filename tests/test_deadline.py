@@ -0,0 +1,79 @@
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+repo_root = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(repo_root))
+
+from orchestrator.deadline import Deadline, DeadlineExceeded, PipelineCancelled
+
+
+def test_stage_timeout_uses_stage_budget():
+    deadline = Deadline(timeout=100, stage_timeouts={"llm": 5})
+    assert deadline.timeout("llm") == 5
+
+
+def test_stage_timeout_capped_by_remaining_time():
+    deadline = Deadline(timeout=1, stage_timeouts={"llm": 60})
+    assert deadline.timeout("llm") <= 1
+
+
+def test_expired_deadline_raises():
+    deadline = Deadline(timeout=0.01)
+    time.sleep(0.02)
+    with pytest.raises(DeadlineExceeded):
+        deadline.timeout("tts")
+
+
+def test_cancel_raises():
+    deadline = Deadline()
+    deadline.cancel()
+    with pytest.raises(PipelineCancelled):
+        deadline.check("llm")
+
+
+def test_from_env(monkeypatch):
+    monkeypatch.setenv("STORY_TIMEOUT", "30")
+    monkeypatch.setenv("STAGE_TIMEOUT_TTS", "7")
+    deadline = Deadline.from_env(timeout=20)
+    assert deadline.remaining() <= 20
+    assert deadline.timeout("tts") == 7
+
+
+def test_non_positive_timeout_rejected():
+    with pytest.raises(ValueError):
+        Deadline(timeout=0)
+    with pytest.raises(ValueError):
+        Deadline.from_env(timeout=0)
+
+
+def test_for_stage_shares_one_budget():
+    deadline = Deadline(timeout=100, stage_timeouts={"sources": 0.05})
+    stage = deadline.for_stage("sources")
+    assert stage.timeout("sources") <= 0.05
+    time.sleep(0.06)
+    with pytest.raises(DeadlineExceeded):
+        stage.timeout("sources")
+
+
+def test_cancel_runs_callbacks_once():
+    deadline = Deadline()
+    calls = []
+    deadline.for_stage("sources").on_cancel(lambda: calls.append(1))
+    deadline.cancel()
+    deadline.cancel()
+    deadline.on_cancel(lambda: calls.append(2))
+    assert calls == [1, 2]
+
+
+def test_child_cancel_leaves_parent_running():
+    parent = Deadline(timeout=100)
+    child = parent.child()
+    child.cancel()
+    assert child.cancelled and not parent.cancelled
+    other = parent.child()
+    parent.cancel()
+    assert other.cancelled
+    assert other.expires_at == parent.expires_at
@@ -0,0 +1,191 @@
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+repo_root = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(repo_root))
+
+from orchestrator.checkpoints import Checkpoint, interrupted_runs
+from orchestrator.deadline import Deadline
+from orchestrator.lifecycle import Lifecycle, ShuttingDown
+
+FINGERPRINT = "ab" * 32
+
+
+def test_draining_rejects_new_runs():
+    lifecycle = Lifecycle()
+    assert lifecycle.drain(grace_period=0) == 0
+    with pytest.raises(ShuttingDown):
+        with lifecycle.track(Deadline()):
+            pass
+
+
+def test_drain_waits_for_in_flight_runs():
+    lifecycle = Lifecycle()
+    started = threading.Event()
+
+    def run():
+        with lifecycle.track(Deadline()):
+            started.set()
+            time.sleep(0.2)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    started.wait()
+    assert lifecycle.in_flight == 1
+    assert lifecycle.drain(grace_period=5) == 0
+    assert lifecycle.in_flight == 0
+    thread.join()
+
+
+def test_drain_hands_off_unfinished_runs(tmp_path):
+    lifecycle = Lifecycle()
+    deadline = Deadline()
+    checkpoint = Checkpoint(tmp_path / "outputs", FINGERPRINT)
+    checkpoint.start({"prompt": "p"})
+
+    with lifecycle.track(deadline, checkpoint):
+        assert lifecycle.drain(grace_period=0.01) == 1
+        assert deadline.cancelled
+        assert checkpoint.state()["status"] == "interrupted"
+
+    # A failure while unwinding must not hide the run from other instances.
+    checkpoint.fail("story", RuntimeError("cancelled"))
+    assert [c.fingerprint for c in interrupted_runs(tmp_path / "outputs")] == [FINGERPRINT]
+
+
+def test_interrupted_run_is_claimed_once(tmp_path):
+    Checkpoint(tmp_path / "outputs", FINGERPRINT).start({"prompt": "p"})
+    first = Checkpoint(tmp_path / "outputs", FINGERPRINT)
+    second = Checkpoint(tmp_path / "outputs", FINGERPRINT)
+    assert first.claim()
+    assert not second.claim()
+    second.release()
+    assert not Checkpoint(tmp_path / "outputs", FINGERPRINT).claim()
+    first.release()
+    assert second.claim()
+
+
+def test_second_drain_returns_immediately():
+    lifecycle = Lifecycle()
+    release = threading.Event()
+
+    def run():
+        with lifecycle.track(Deadline()):
+            release.wait(5)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    while lifecycle.in_flight == 0:
+        time.sleep(0.01)
+    assert lifecycle.drain(grace_period=0.01) == 1
+
+    started = time.monotonic()
+    assert lifecycle.drain(grace_period=5) == 0
+    assert time.monotonic() - started < 1
+    release.set()
+    thread.join()
+
+
+def test_stale_claim_is_taken_over(tmp_path):
+    Checkpoint(tmp_path / "outputs", FINGERPRINT).start({"prompt": "p"})
+    dead = Checkpoint(tmp_path / "outputs", FINGERPRINT)
+    assert dead.claim()
+    other = Checkpoint(tmp_path / "outputs", FINGERPRINT)
+    assert not other.claim(ttl_seconds=60)
+
+    old = time.time() - 120
+    os.utime(dead.directory / "claim", (old, old))
+    assert other.claim(ttl_seconds=60)
+    assert not Checkpoint(tmp_path / "outputs", FINGERPRINT).claim(ttl_seconds=60)
+    dead.release()  # must not drop the new owner's claim
+    assert (dead.directory / "claim").exists()
+    assert sorted(p.name for p in dead.directory.iterdir()) == ["claim", "state.json"]
+
+
+def test_signal_handler_drains_then_forwards():
+    lifecycle = Lifecycle()
+    forwarded = []
+    original = signal.signal(signal.SIGUSR1, lambda *args: forwarded.append(args))
+    try:
+        lifecycle.install_signal_handler(grace_period=1, signum=signal.SIGUSR1)
+        os.kill(os.getpid(), signal.SIGUSR1)
+        for _ in range(200):
+            if forwarded:
+                break
+            time.sleep(0.01)
+        assert lifecycle.draining
+        assert len(forwarded) == 1
+        # The previous handler is back in place for later signals.
+        os.kill(os.getpid(), signal.SIGUSR1)
+        time.sleep(0.05)
+        assert len(forwarded) == 2
+    finally:
+        signal.signal(signal.SIGUSR1, original)
+
+
+DRAIN_SCRIPT = """
+import sys, threading, time
+sys.path.insert(0, sys.argv[1])
+from orchestrator.deadline import Deadline
+from orchestrator.lifecycle import Lifecycle
+
+lifecycle = Lifecycle()
+lifecycle.install_signal_handler(grace_period=5)
+
+def run():
+    with lifecycle.track(Deadline()):
+        time.sleep(0.5)
+        print("finished", flush=True)
+
+threading.Thread(target=run).start()
+print("ready", flush=True)
+time.sleep(30)
+print("not terminated", flush=True)
+"""
+
+
+def test_sigterm_drains_and_exits():
+    proc = subprocess.Popen(
+        [sys.executable, "-c", DRAIN_SCRIPT, str(repo_root)],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        assert proc.stdout.readline().strip() == "ready"
+        proc.send_signal(signal.SIGTERM)
+        returncode = proc.wait(timeout=10)
+    finally:
+        proc.kill()
+    assert returncode == -signal.SIGTERM
+    assert proc.stdout.read().split() == ["finished"]
+
+
+def test_run_of_dead_resumer_is_listed_again(tmp_path):
+    checkpoint = Checkpoint(tmp_path / "outputs", FINGERPRINT)
+    checkpoint.start({"prompt": "p"})
+    checkpoint.interrupt()
+    dead = Checkpoint(tmp_path / "outputs", FINGERPRINT)
+    assert dead.claim()
+    dead.start({"prompt": "p"})  # the resumer dies after this
+
+    # Still listed, but only claimable once the dead instance's claim expires.
+    assert [c.fingerprint for c in interrupted_runs(tmp_path / "outputs")] == [FINGERPRINT]
+    other = Checkpoint(tmp_path / "outputs", FINGERPRINT)
+    assert not other.claim(ttl_seconds=60)
+    old = time.time() - 120
+    os.utime(dead.directory / "claim", (old, old))
+    assert other.claim(ttl_seconds=60)
+
+    # Failed and unclaimed running runs are left alone.
+    other.release()
+    assert interrupted_runs(tmp_path / "outputs") == []
+    assert other.claim()
+    checkpoint.fail("story", RuntimeError("down"))
+    assert interrupted_runs(tmp_path / "outputs") == []
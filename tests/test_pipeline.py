@@ -1,8 +1,11 @@
 import json
 import importlib
+import os
 import re
 import sys
 import threading
+import time
+from contextlib import contextmanager
 from http.server import BaseHTTPRequestHandler, HTTPServer
 from pathlib import Path
 
@@ -61,26 +64,20 @@ def tts_server():
     thread.join()
 
 
-def _slugify(value: str) -> str:
-    value = value.lower()
-    value = re.sub(r"[^a-z0-9]+", "-", value)
-    value = value.strip("-")
-    return value or "output"
-
-
-def _run_pipeline(
-    tmp_path: Path,
-    prompt: str,
-    language: str,
-    llm_url: str,
-    tts_url: str,
-    tts_engine: str = "opentts",
-    location: str | None = None,
-) -> tuple[Path, tuple[Path, Path, str, bytes]]:
-    requests_stub = '''\
+REQUESTS_STUB = '''\
 import json as _json
+import types as _types
 from urllib import request as _request
 
+class RequestException(Exception):
+    pass
+
+class HTTPError(RequestException):
+    pass
+
+class Timeout(RequestException):
+    pass
+
 class Response:
     def __init__(self, resp):
         self.content = resp.read()
@@ -88,7 +85,7 @@ class Response:
 
     def raise_for_status(self):
         if self.status_code >= 400:
-            raise Exception(self.status_code)
+            raise HTTPError(self.status_code)
 
     def json(self):
         try:
@@ -100,24 +97,70 @@ class Response:
     def text(self):
         return self.content.decode()
 
-def post(url, json=None):
+def post(url, json=None, timeout=None):
     data = None
     if json is not None:
         data = _json.dumps(json).encode()
     req = _request.Request(url, data=data, headers={'Content-Type': 'application/json'})
-    resp = _request.urlopen(req)
+    try:
+        resp = _request.urlopen(req, timeout=timeout)
+    except _request.HTTPError as exc:
+        resp = exc
     return Response(resp)
+
+class HTTPAdapter:
+    pass
+
+adapters = _types.SimpleNamespace(HTTPAdapter=HTTPAdapter)
+
+class Session:
+    def mount(self, prefix, adapter):
+        pass
+
+    def post(self, url, json=None, timeout=None):
+        return post(url, json=json, timeout=timeout)
+
+    def close(self):
+        pass
 '''
 
-    (tmp_path / "requests.py").write_text(requests_stub)
+
+def _slugify(value: str) -> str:
+    value = value.lower()
+    value = re.sub(r"[^a-z0-9]+", "-", value)
+    value = value.strip("-")
+    return value or "output"
+
+
+@contextmanager
+def _pipeline_main(tmp_path: Path):
+    """Import ``orchestrator.main`` against the requests stub in ``tmp_path``."""
+    (tmp_path / "requests.py").write_text(REQUESTS_STUB)
 
     repo_root = Path(__file__).resolve().parents[1]
     sys.modules.pop("requests", None)
     sys.path.insert(0, str(repo_root))
     sys.path.insert(0, str(tmp_path))
     try:
-        main = importlib.import_module("orchestrator.main")
-        importlib.reload(main)
+        # Re-import the modules holding HTTP sessions so they use this stub.
+        for name in ("orchestrator.transport", "orchestrator.main"):
+            sys.modules.pop(name, None)
+        yield importlib.import_module("orchestrator.main")
+    finally:
+        sys.path.remove(str(tmp_path))
+        sys.path.remove(str(repo_root))
+
+
+def _run_pipeline(
+    tmp_path: Path,
+    prompt: str,
+    language: str,
+    llm_url: str,
+    tts_url: str,
+    tts_engine: str = "opentts",
+    location: str | None = None,
+) -> tuple[Path, tuple[Path, Path, str, bytes]]:
+    with _pipeline_main(tmp_path) as main:
         final_prompt = prompt
         if location is not None:
             wiki = main.fetch_wikipedia_extract(location)
@@ -137,10 +180,6 @@ def post(url, json=None):
             location=location,
             output_base_dir=tmp_path,
         )
-        md_path, audio_path, text, audio_bytes = result
-    finally:
-        sys.path.remove(str(tmp_path))
-        sys.path.remove(str(repo_root))
 
     return tmp_path / "outputs" / _slugify(final_prompt), result
 
@@ -197,10 +236,10 @@ def test_pipeline_location_context(tmp_path, tts_server, monkeypatch):
     voyage_text = "Voyage info"
 
     monkeypatch.setattr(
-        "orchestrator.sources.fetch_wikipedia_extract", lambda loc: wiki_text
+        "orchestrator.sources.fetch_wikipedia_extract", lambda loc, timeout=None, session=None: wiki_text
     )
     monkeypatch.setattr(
-        "orchestrator.sources.fetch_wikivoyage_extract", lambda loc: voyage_text
+        "orchestrator.sources.fetch_wikivoyage_extract", lambda loc, timeout=None, session=None: voyage_text
     )
 
     class _EchoHandler(BaseHTTPRequestHandler):
@@ -241,3 +280,290 @@ def test_pipeline_location_context(tmp_path, tts_server, monkeypatch):
     assert md_text.index("Base prompt") < md_text.index(wiki_text) < md_text.index(
         voyage_text
     )
+
+
+def test_pipeline_variants(tmp_path, tts_server):
+    class _EchoHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            data = json.loads(self.rfile.read(length))
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(json.dumps({"story": data["inputs"]}).encode())
+
+        def log_message(self, *args):  # pragma: no cover
+            pass
+
+    server, thread, llm_url = _start_server(_EchoHandler)
+    tts_url, requests_data = tts_server
+    try:
+        with _pipeline_main(tmp_path) as main:
+            profiler = main.PipelineProfiler()
+            variants = main.run_story_variants(
+                prompt="Prompt Variants",
+                languages=["English", "Spanish", "English"],
+                style="fun",
+                llm_url=llm_url,
+                tts_url=tts_url,
+                voices=["coqui", "bark", "coqui"],
+                output_base_dir=tmp_path,
+                profiler=profiler,
+            )
+            profile_dir = profiler.dump(
+                main._profile_dir(tmp_path / "outputs" / "prompt-variants")
+            )
+            with pytest.raises(ValueError, match="en-us"):
+                main.run_story_variants(
+                    prompt="Prompt Collision",
+                    languages=["en-US", "en_us"],
+                    style="fun",
+                    llm_url=llm_url,
+                    tts_url=tts_url,
+                    output_base_dir=tmp_path,
+                )
+    finally:
+        server.shutdown()
+        thread.join()
+
+    out_dir = tmp_path / "outputs" / "prompt-variants"
+    assert [v["language"] for v in variants] == ["English", "Spanish"]
+    assert len(requests_data) == 4
+    assert sorted(r["body"]["speaker"] for r in requests_data) == [
+        "bark",
+        "bark",
+        "coqui",
+        "coqui",
+    ]
+    for variant in variants:
+        lang_dir = out_dir / _slugify(variant["language"])
+        assert variant["markdown"] == lang_dir / "story.md"
+        assert variant["language"] in variant["text"]
+        assert lang_dir.joinpath("story.md").read_text() == variant["text"]
+        assert set(variant["audio"]) == {"coqui", "bark"}
+        for voice, (path, data) in variant["audio"].items():
+            assert path == lang_dir / f"{voice}.mp3"
+            assert path.read_bytes() == data == b"TESTMP3"
+
+    manifest = json.loads((out_dir / "variants.json").read_text())
+    assert manifest["variants"][1] == {
+        "language": "Spanish",
+        "markdown": "spanish/story.md",
+        "audio": {"coqui": "spanish/coqui.mp3", "bark": "spanish/bark.mp3"},
+    }
+
+    # Every LLM and TTS task gets its own profile, kept out of outputs/.
+    stages = {entry["stage"] for entry in profiler.stages}
+    assert {"llm-english", "llm-spanish", "tts-spanish-bark"} <= stages
+    assert profile_dir == tmp_path / "profiles" / "prompt-variants"
+    assert (profile_dir / "summary.json").exists()
+
+
+def test_pipeline_resumes_after_tts_failure(tmp_path):
+    llm_calls = []
+    tts_calls = []
+
+    class _CountingLLMHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            llm_calls.append(self.path)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(json.dumps({"story": "This is a test story."}).encode())
+
+        def log_message(self, *args):  # pragma: no cover
+            pass
+
+    class _FlakyTTSHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            tts_calls.append(self.path)
+            self.send_response(500 if len(tts_calls) == 1 else 200)
+            self.end_headers()
+            self.wfile.write(b"TESTMP3")
+
+        def log_message(self, *args):  # pragma: no cover
+            pass
+
+    llm, llm_thread, llm_url = _start_server(_CountingLLMHandler)
+    tts, tts_thread, tts_url = _start_server(_FlakyTTSHandler)
+    try:
+        with _pipeline_main(tmp_path) as main:
+            kwargs = dict(prompt="Prompt Retry", language="English", style="fun")
+            with pytest.raises(Exception):
+                main.run_story(
+                    llm_url=llm_url, tts_url=tts_url, output_base_dir=tmp_path, **kwargs
+                )
+            fingerprint = main.story_fingerprint(**kwargs)
+            checkpoint = main.Checkpoint(tmp_path / "outputs", fingerprint)
+            assert checkpoint.state()["failed_stage"] == "audio"
+            assert checkpoint.completed_stages() == ["prompt", "story"]
+
+            # A template change must not orphan the checkpoint or re-run the LLM.
+            template = tmp_path / "template.txt"
+            template.write_text("New {prompt} {language} {style}")
+            main.TEMPLATE_PATH = template
+            md_path, audio_path, text, audio_bytes = main.retry_story(
+                fingerprint, llm_url=llm_url, tts_url=tts_url, output_base_dir=tmp_path
+            )
+    finally:
+        llm.shutdown()
+        llm_thread.join()
+        tts.shutdown()
+        tts_thread.join()
+
+    assert len(llm_calls) == 1
+    assert len(tts_calls) == 2
+    assert text == "This is a test story."
+    assert audio_path.read_bytes() == audio_bytes == b"TESTMP3"
+    assert checkpoint.state() is None
+    with pytest.raises(LookupError):
+        main.retry_story(fingerprint, llm_url=llm_url, tts_url=tts_url, output_base_dir=tmp_path)
+
+
+def test_variants_resume_only_failed_voices(tmp_path):
+    llm_calls = []
+    tts_calls = []
+
+    class _CountingLLMHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            llm_calls.append(self.path)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(json.dumps({"story": "This is a test story."}).encode())
+
+        def log_message(self, *args):  # pragma: no cover
+            pass
+
+    class _FlakyTTSHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            speaker = json.loads(self.rfile.read(length))["speaker"]
+            tts_calls.append(speaker)
+            failing = speaker == "bark" and tts_calls.count("bark") == 1
+            self.send_response(500 if failing else 200)
+            self.end_headers()
+            self.wfile.write(b"TESTMP3")
+
+        def log_message(self, *args):  # pragma: no cover
+            pass
+
+    llm, llm_thread, llm_url = _start_server(_CountingLLMHandler)
+    tts, tts_thread, tts_url = _start_server(_FlakyTTSHandler)
+    try:
+        with _pipeline_main(tmp_path) as main:
+            kwargs = dict(
+                prompt="Prompt Variant Retry",
+                languages=["English"],
+                voices=["coqui", "bark"],
+                style="fun",
+            )
+            with pytest.raises(Exception):
+                main.run_story_variants(
+                    llm_url=llm_url,
+                    tts_url=tts_url,
+                    output_base_dir=tmp_path,
+                    max_workers=1,
+                    **kwargs,
+                )
+            fingerprint = main.variants_fingerprint(**kwargs)
+            checkpoint = main.Checkpoint(tmp_path / "outputs", fingerprint)
+            assert checkpoint.state()["failed_stage"] == "audio-english-bark"
+            assert checkpoint.get("story-english") == b"This is a test story."
+
+            variants = main.retry_story(
+                fingerprint, llm_url=llm_url, tts_url=tts_url, output_base_dir=tmp_path
+            )
+    finally:
+        llm.shutdown()
+        llm_thread.join()
+        tts.shutdown()
+        tts_thread.join()
+
+    assert len(llm_calls) == 1
+    assert tts_calls.count("bark") == 2
+    assert set(variants[0]["audio"]) == {"coqui", "bark"}
+    assert checkpoint.state() is None
+
+
+def test_resume_interrupted_runs(tmp_path, llm_server, tts_server):
+    tts_url, requests_data = tts_server
+    with _pipeline_main(tmp_path) as main:
+        params = dict(prompt="Prompt Handoff", language="English", style="fun")
+        fingerprint = main.story_fingerprint(**params)
+        checkpoint = main.Checkpoint(tmp_path / "outputs", fingerprint)
+        checkpoint.start({**params, "tts_engine": "opentts", "location": None})
+        checkpoint.interrupt()
+
+        resumed = main.resume_interrupted_runs(
+            llm_server, tts_url, output_base_dir=tmp_path, lifecycle=main.Lifecycle()
+        )
+
+    assert resumed == 1
+    out_dir = tmp_path / "outputs" / "prompt-handoff"
+    assert (out_dir / "story.md").read_text() == "This is a test story."
+    assert (out_dir / "story.mp3").read_bytes() == b"TESTMP3"
+    assert checkpoint.state() is None
+
+
+def test_resume_run_of_dead_resumer(tmp_path, llm_server, tts_server):
+    tts_url, _ = tts_server
+    with _pipeline_main(tmp_path) as main:
+        params = dict(prompt="Prompt Dead Resumer", language="English", style="fun")
+        fingerprint = main.story_fingerprint(**params)
+        checkpoint = main.Checkpoint(tmp_path / "outputs", fingerprint)
+        checkpoint.start({**params, "tts_engine": "opentts", "location": None})
+        checkpoint.interrupt()
+        # An instance claimed the run, restarted it and was killed.
+        assert checkpoint.claim()
+        checkpoint.start({})
+
+        def resume():
+            return main.resume_interrupted_runs(
+                llm_server, tts_url, output_base_dir=tmp_path, lifecycle=main.Lifecycle()
+            )
+
+        assert resume() == 0
+        # The claim outlived the one-hour claim TTL.
+        old = time.time() - 2 * 3600
+        os.utime(checkpoint.directory / "claim", (old, old))
+        assert resume() == 1
+
+    out_dir = tmp_path / "outputs" / "prompt-dead-resumer"
+    assert (out_dir / "story.mp3").read_bytes() == b"TESTMP3"
+    assert checkpoint.state() is None
+
+
+def test_variants_close_session_when_sources_fail(tmp_path, monkeypatch):
+    with _pipeline_main(tmp_path) as main:
+        sessions = []
+        open_session = main.open_session
+
+        def recording_session(deadline):
+            session = open_session(deadline)
+            session.closed = False
+            close = session.close
+            session.close = lambda: (close(), setattr(session, "closed", True))
+            sessions.append(session)
+            return session
+
+        def failing_context(location, deadline, session=None):
+            raise RuntimeError("wiki down")
+
+        monkeypatch.setattr(main, "open_session", recording_session)
+        monkeypatch.setattr(main, "fetch_location_context", failing_context)
+        with pytest.raises(RuntimeError):
+            main.run_story_variants(
+                prompt="Prompt Sources",
+                languages=["English", "Spanish"],
+                style="fun",
+                llm_url="http://unused",
+                tts_url="http://unused",
+                location="Berlin",
+                output_base_dir=tmp_path,
+            )
+
+    assert [s.closed for s in sessions] == [True]
@@ -0,0 +1,73 @@
+import json
+import threading
+import pstats
+import sys
+import tracemalloc
+from pathlib import Path
+
+repo_root = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(repo_root))
+
+from orchestrator.profiling import PipelineProfiler
+
+
+def test_profiler_writes_stage_files(tmp_path):
+    profiler = PipelineProfiler()
+    with profiler.stage("llm"):
+        data = [str(i) for i in range(1000)]
+    with profiler.stage("write_text"):
+        (tmp_path / "story.md").write_text("".join(data))
+
+    out = profiler.dump(tmp_path / "profile")
+
+    summary = json.loads((out / "summary.json").read_text())
+    assert [s["stage"] for s in summary["stages"]] == ["llm", "write_text"]
+    for entry in summary["stages"]:
+        assert entry["wall_seconds"] >= 0
+        pstats.Stats(str(out / entry["profile"]))
+        tracemalloc.Snapshot.load(str(out / entry["tracemalloc"]))
+    assert not tracemalloc.is_tracing()
+
+
+def test_disabled_profiler_records_nothing(tmp_path):
+    profiler = PipelineProfiler(enabled=False)
+    with profiler.stage("llm"):
+        pass
+    assert profiler.stages == []
+
+
+def test_wrap_profiles_on_worker_thread():
+    profiler = PipelineProfiler()
+    threads = []
+    task = profiler.wrap("tts", lambda: threads.append(threading.get_ident()))
+    worker = threading.Thread(target=task)
+    worker.start()
+    worker.join()
+    assert threads == [worker.ident]
+    assert [s["stage"] for s in profiler.stages] == ["tts"]
+    assert profiler.stages[0]["profile"].getstats()
+
+
+def test_concurrent_stages_do_not_wait(tmp_path):
+    slow, fast = PipelineProfiler(), PipelineProfiler()
+    entered, release = threading.Event(), threading.Event()
+
+    def hold():
+        with slow.stage("llm"):
+            entered.set()
+            release.wait(5)
+
+    worker = threading.Thread(target=hold)
+    worker.start()
+    entered.wait(5)
+    try:
+        with fast.stage("tts"):
+            pass
+        assert [s["stage"] for s in fast.stages] == ["tts"]
+        fast.dump(tmp_path / "fast")
+        assert tracemalloc.is_tracing()  # still used by the slow profiler
+    finally:
+        release.set()
+        worker.join()
+    slow.dump(tmp_path / "slow")
+    assert not tracemalloc.is_tracing()
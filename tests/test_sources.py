@@ -6,7 +6,7 @@ repo_root = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(repo_root))
 
 requests_stub = types.SimpleNamespace()
-def _fake_get(url, headers=None):
+def _fake_get(url, headers=None, timeout=None):
     raise AssertionError("should be patched")
 requests_stub.get = _fake_get
 sys.modules['requests'] = requests_stub
@@ -17,8 +17,9 @@ from orchestrator import sources
 def test_fetch_wikipedia_extract(monkeypatch):
     captured = {}
 
-    def fake_get(url, headers=None):
+    def fake_get(url, headers=None, timeout=None):
         captured['url'] = url
+        captured['timeout'] = timeout
         class Resp:
             def raise_for_status(self):
                 pass
@@ -30,13 +31,15 @@ def test_fetch_wikipedia_extract(monkeypatch):
     result = sources.fetch_wikipedia_extract('Berlin')
     assert 'Berlin' in captured['url']
     assert result == 'Info about place'
+    assert captured['timeout'] == 10.0
 
 def test_fetch_wikivoyage_extract(monkeypatch):
     captured = {}
 
-    def fake_get(url, params=None, headers=None):
+    def fake_get(url, params=None, headers=None, timeout=None):
         captured['url'] = url
         captured['params'] = params
+        captured['timeout'] = timeout
         class Resp:
             def raise_for_status(self):
                 pass
@@ -50,3 +53,21 @@ def test_fetch_wikivoyage_extract(monkeypatch):
     result = sources.fetch_wikivoyage_extract('Berlin')
     assert captured['params']['titles'] == 'Berlin'
     assert result == 'Travel info'
+
+
+def test_fetch_timeout_is_passed_through(monkeypatch):
+    captured = {}
+
+    def fake_get(url, headers=None, timeout=None):
+        captured['timeout'] = timeout
+        class Resp:
+            def raise_for_status(self):
+                pass
+            def json(self):
+                return {}
+        return Resp()
+
+    monkeypatch.setattr(sources.requests, 'get', fake_get)
+    sources.fetch_wikipedia_extract('Berlin', timeout=2.5)
+    assert captured['timeout'] == 2.5
+